@@ -5,19 +5,25 @@ displaying, and navigating through procedurally generated mazes with optional
 pattern generation and path visualization.
 """
 
+import cProfile
+import pstats
 import sys
+from mazegen import instrument
 from mazegen import ConfigParser, Maze, MazeGenerator, PathFinder, MazeDisplay
+from mazegen import StreamingGenerator
+from mazegen.generator import ALGORITHMS
+from mazegen.terrain import DEFAULT_MAX_COST, load_costs, noise_costs
+from mazegen.tiled import TiledGenerator, parse_tiles
 
-
-def clear_screen() -> None:
-    """Clear the terminal screen and move cursor to home position."""
-    print("\033[2J\033[H", end="")
+MENU_LINES = 16
+PAN_KEYS = {"w": (0, -1), "a": (-1, 0), "s": (0, 1), "d": (1, 0)}
+PROFILE_LIMIT = 25
 
 
 def main() -> None:
     """Main application loop for the maze generator.
 
-    Limits recursive calls, reads configuration, generates a maze,
+    Reads configuration, generates a maze,
     finds a path, and provides an interactive interface for displaying
     and manipulating the maze.
 
@@ -25,9 +31,8 @@ def main() -> None:
         SystemExit: If incorrect command line arguments are provided.
     """
     try:
-        sys.setrecursionlimit(100000)
         if len(sys.argv) != 2:
-            print(f"Usage: python3 {sys.argv[0]} <config_file>")
+            print(f"Usage: python3 {sys.argv[0]} <config_file> [--profile]")
             sys.exit(1)
         print()
         try:
@@ -42,6 +47,30 @@ def main() -> None:
                 raise KeyError("Missing OUTPUT_FILE key")
             seed = config.get_int("SEED") if config.get("SEED") else None
             perfect = config.get_bool("PERFECT")
+            stream = config.get_bool("STREAM")
+            algorithm = config.get("ALGORITHM", "backtracker")
+            loop_percentage = config.get_float("LOOP_PERCENTAGE", 0.15)
+            if not 0 <= loop_percentage <= 1:
+                raise ValueError("LOOP_PERCENTAGE must be between 0 and 1")
+            if algorithm not in ALGORITHMS:
+                raise ValueError(f"Unknown ALGORITHM: {algorithm}")
+            tiles_value = config.get("TILES")
+            tiles = parse_tiles(tiles_value) if tiles_value else None
+            workers = config.get_int("WORKERS") if config.get("WORKERS") \
+                else None
+            terrain = config.get("TERRAIN")
+            if stream and terrain:
+                raise ValueError("TERRAIN cannot be used with STREAM=True")
+            costs = None
+            if terrain == "noise":
+                max_cost = (config.get_int("TERRAIN_MAX_COST")
+                            if config.get("TERRAIN_MAX_COST")
+                            else DEFAULT_MAX_COST)
+                costs = noise_costs(width, height, seed, max_cost)
+            elif terrain:
+                costs = load_costs(terrain, width)
+            if config.get_bool("PROFILE"):
+                instrument.enable()
         except (FileNotFoundError, ValueError, KeyError) as e:
             print(f"Configuration Error: {e}")
             sys.exit(1)
@@ -50,11 +79,31 @@ def main() -> None:
             error = "Error: maze dimensions too small for 42 pattern," \
                     " maze creation will proceed without 42 pattern..."
             print(error)
+
+        if stream:
+            streamer = StreamingGenerator(width, height, entry, exit_pos,
+                                          seed=seed)
+            streamer.write(output_file, perfect=perfect,
+                           loop_percentage=loop_percentage)
+            print(f"Maze streamed to {output_file}")
+            return
+
         maze = Maze(width, height, entry, exit_pos)
-        generator = MazeGenerator(maze, seed=seed)
+        if costs is not None:
+            try:
+                maze.set_costs(costs)
+            except ValueError as e:
+                print(f"Configuration Error: {e}")
+                sys.exit(1)
+        if tiles:
+            generator: MazeGenerator = TiledGenerator(
+                maze, seed=seed, algorithm=algorithm, tiles=tiles,
+                workers=workers)
+        else:
+            generator = MazeGenerator(maze, seed=seed, algorithm=algorithm)
         pathfinder = PathFinder(maze)
 
-        generator.generate(perfect=perfect)
+        generator.generate(perfect=perfect, loop_percentage=loop_percentage)
 
         display = MazeDisplay(maze, set(generator.pattern_42_cells))
         path = pathfinder.find_path(entry, exit_pos)
@@ -65,11 +114,19 @@ def main() -> None:
 
         display.set_path(path)
         maze.to_file(output_file, path)
-        print(f"Maze saved to {output_file}\n")
-
+        print(f"Maze saved to {output_file}")
+        print(f"Generated with {algorithm} at "
+              f"{generator.cells_per_second:,.0f} cells/s\n")
+
+        # Only path and pattern toggles keep the screen in a state that
+        # allows redrawing just the cells that changed
+        full_redraw = True
+        display.center_on(*entry)
         while True:
-            clear_screen()
-            display.display()
+            # Mazes larger than the terminal are shown through a viewport
+            display.viewport = not display.fits_terminal(MENU_LINES)
+            display.redraw(full=full_redraw, footer=MENU_LINES)
+            full_redraw = True
 
             print("\n" + "=" * 50)
             print("Commands:")
@@ -78,20 +135,43 @@ def main() -> None:
             print("  [n] Generate new maze")
             print("  [c] Change wall color")
             print("  [2] Change '42' pattern color")
+            if maze.costs is not None:
+                print("  [t] Show/Hide terrain costs")
+            if display.viewport:
+                print("  [w/a/s/d] Scroll up/left/down/right")
+                print("  [e] Jump to entry")
+                print("  [x] Jump to exit")
             print("  [q] Quit")
             print("=" * 50)
             try:
                 choice = input("Your choice: ").lower().strip()
 
-                if choice == "p":
+                if display.viewport and choice in PAN_KEYS:
+                    dx, dy = PAN_KEYS[choice]
+                    display.pan(dx * max(1, display.view_width // 2),
+                                dy * max(1, display.view_height // 2))
+
+                elif display.viewport and choice == "e":
+                    display.center_on(*entry)
+
+                elif display.viewport and choice == "x":
+                    display.center_on(*exit_pos)
+
+                elif choice == "p":
                     display.toggle_path()
+                    full_redraw = False
 
                 elif choice == "4":
                     display.toggle_pattern()
+                    full_redraw = False
+
+                elif maze.costs is not None and choice == "t":
+                    display.toggle_costs()
 
                 elif choice == "n":
                     print("Generating new maze...")
-                    generator.generate(perfect=perfect)
+                    generator.generate(perfect=perfect,
+                                       loop_percentage=loop_percentage)
                     display.set_pattern(set(generator.pattern_42_cells))
                     path = pathfinder.find_path(entry, exit_pos)
                     if path:
@@ -122,7 +202,27 @@ def main() -> None:
                 return
     except BaseException as e:
         print(e)
+    finally:
+        if instrument.ENABLED:
+            print(instrument.metrics.report())
+
+
+def profile_main() -> None:
+    """Run the application under cProfile and print the hottest calls.
+
+    Instrumentation is switched on as well, so the pipeline timers and
+    counters are printed before the profile.
+    """
+    instrument.enable()
+    profiler = cProfile.Profile()
+    profiler.runcall(main)
+    stats = pstats.Stats(profiler)
+    stats.sort_stats("cumulative").print_stats(PROFILE_LIMIT)
 
 
 if __name__ == "__main__":
-    main()
+    if "--profile" in sys.argv:
+        sys.argv.remove("--profile")
+        profile_main()
+    else:
+        main()
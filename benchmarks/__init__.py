@@ -0,0 +1 @@
+"""Benchmarks for the mazegen pipeline, run with 'make bench'."""
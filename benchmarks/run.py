@@ -0,0 +1,103 @@
+"""Command line entry point of the benchmark suite.
+
+Usage: python3 -m benchmarks.run [--sizes 50x50,200x200] [--repeat N]
+       [--output FILE] [--baseline FILE] [--threshold FRACTION]
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from benchmarks.suite import SIZES, BenchResult, compare, run_suite
+from typing import List, Tuple
+
+
+def parse_sizes(text: str) -> List[Tuple[int, int]]:
+    """Parse a comma-separated list of WIDTHxHEIGHT sizes.
+
+    Args:
+        text: The sizes, e.g. '50x50,200x100'. A bare number N stands
+            for NxN.
+
+    Returns:
+        The (width, height) pairs.
+
+    Raises:
+        ValueError: If a size is malformed.
+    """
+    sizes = []
+    for part in text.split(","):
+        width, _, height = part.strip().lower().partition("x")
+        sizes.append((int(width), int(height or width)))
+    return sizes
+
+
+def print_result(result: BenchResult) -> None:
+    """Print one result as a table row.
+
+    Args:
+        result: The benchmark result.
+    """
+    size = f"{result.width}x{result.height}"
+    print(f"{result.name:<20} {size:>11} {result.seconds:>10.4f}s "
+          f"{result.cells_per_second:>16,.0f} cells/s "
+          f"{result.peak_bytes / 1e6:>10.2f} MB peak")
+
+
+def main() -> None:
+    """Run the suite, write the JSON report and check for regressions."""
+    parser = argparse.ArgumentParser(
+        prog="python3 -m benchmarks.run",
+        description="Time generation, solving, writing and rendering.",
+    )
+    parser.add_argument("--sizes", type=parse_sizes, default=SIZES,
+                        help="maze sizes, e.g. 50x50,200x200 "
+                        "(default: 50x50 up to 2000x2000)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="timed runs per benchmark, fastest kept")
+    parser.add_argument("--output", metavar="FILE", default=None,
+                        help="write the results to this JSON file")
+    parser.add_argument("--baseline", metavar="FILE", default=None,
+                        help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="tolerated slowdown against the baseline "
+                        "(default: 0.2)")
+    args = parser.parse_args()
+
+    results = run_suite(args.sizes, args.repeat, print_result)
+
+    if args.output:
+        report = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": [result._asdict() for result in results],
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"Results written to {args.output}")
+
+    if not args.baseline:
+        return
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, nothing to compare")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+
+    regressions = compare(results, baseline, args.threshold)
+    if not regressions:
+        print(f"No regression beyond {args.threshold:.0%} "
+              f"against {args.baseline}")
+        return
+    for result, ratio in regressions:
+        print(f"Regression: {result.name} at {result.width}x"
+              f"{result.height} runs at {ratio:.0%} of the baseline")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""Module defining the timed stages of the mazegen pipeline.
+
+Each benchmark splits its work into a setup step, which is not timed,
+and the measured action. The action is timed over several repeats
+keeping the fastest, then run once more under tracemalloc to record
+its peak memory, so tracing never slows down the timed runs.
+"""
+
+import contextlib
+import os
+import tempfile
+import time
+import tracemalloc
+from mazegen import Maze, MazeDisplay, MazeGenerator, PathFinder
+from mazegen.terrain import noise_costs
+from typing import Any, Callable, Dict, List, NamedTuple, Tuple
+
+SIZES = [(50, 50), (200, 200), (500, 500), (1000, 1000), (2000, 2000)]
+
+
+class BenchResult(NamedTuple):
+    """Timing and memory of one benchmark at one maze size."""
+
+    name: str
+    width: int
+    height: int
+    seconds: float
+    cells_per_second: float
+    peak_bytes: int
+
+
+def measure(
+    name: str, width: int, height: int, setup: Callable[[], Any],
+    action: Callable[[Any], None], repeat: int
+) -> BenchResult:
+    """Time an action and record its peak memory.
+
+    Args:
+        name: The name of the benchmark.
+        width: The width of the maze in cells.
+        height: The height of the maze in cells.
+        setup: Builds the untimed input of the action.
+        action: The measured work, called with the result of setup.
+        repeat: How many timed runs to keep the fastest of.
+
+    Returns:
+        The benchmark result.
+    """
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        state = setup()
+        started = time.perf_counter()
+        action(state)
+        best = min(best, time.perf_counter() - started)
+
+    state = setup()
+    tracemalloc.start()
+    try:
+        action(state)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    cells = width * height
+    return BenchResult(name, width, height, best,
+                       cells / best if best > 0 else 0.0, peak)
+
+
+def new_generator(width: int, height: int) -> MazeGenerator:
+    """Build a seeded generator for a maze of the given size.
+
+    Args:
+        width: The width of the maze in cells.
+        height: The height of the maze in cells.
+
+    Returns:
+        A generator whose maze goes from the top-left corner to the
+        bottom-right one.
+    """
+    maze = Maze(width, height, (0, 0), (width - 1, height - 1))
+    return MazeGenerator(maze, seed=42)
+
+
+def solved_maze(width: int, height: int) -> Tuple[Maze, List[str]]:
+    """Generate a perfect maze and its solution.
+
+    Args:
+        width: The width of the maze in cells.
+        height: The height of the maze in cells.
+
+    Returns:
+        A tuple (maze, path).
+    """
+    generator = new_generator(width, height)
+    generator.generate(perfect=True)
+    maze = generator.maze
+    return maze, PathFinder(maze).find_path(maze.entry, maze.exit) or []
+
+
+def run_size(width: int, height: int, repeat: int) -> List[BenchResult]:
+    """Run every benchmark at one maze size.
+
+    Args:
+        width: The width of the maze in cells.
+        height: The height of the maze in cells.
+        repeat: How many timed runs to keep the fastest of.
+
+    Returns:
+        The results, one per benchmark.
+    """
+    maze, path = solved_maze(width, height)
+    results = [
+        measure("generate_perfect", width, height,
+                lambda: new_generator(width, height),
+                lambda generator: generator.generate(perfect=True), repeat),
+        measure("generate_imperfect", width, height,
+                lambda: new_generator(width, height),
+                lambda generator: generator.generate(perfect=False), repeat),
+        measure("find_path", width, height, lambda: PathFinder(maze),
+                lambda finder: finder.find_path(maze.entry, maze.exit),
+                repeat),
+    ]
+
+    weighted = Maze(width, height, maze.entry, maze.exit)
+    weighted.walls[:] = maze.walls
+    weighted.set_costs(noise_costs(width, height, seed=42))
+    results.append(measure(
+        "find_path_weighted", width, height,
+        lambda: PathFinder(weighted, "astar"),
+        lambda finder: finder.find_path(weighted.entry, weighted.exit),
+        repeat))
+
+    with tempfile.TemporaryDirectory() as directory:
+        filepath = os.path.join(directory, "maze.txt")
+        results.append(measure(
+            "to_file", width, height, lambda: filepath,
+            lambda target: maze.to_file(target, path), repeat))
+
+    # A fresh display per run, so the row cache never serves a frame
+    with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+        results.append(measure(
+            "display", width, height, lambda: MazeDisplay(maze),
+            lambda display: display.display(), repeat))
+    return results
+
+
+def run_suite(
+    sizes: List[Tuple[int, int]], repeat: int = 3,
+    progress: Callable[[BenchResult], None] = lambda result: None
+) -> List[BenchResult]:
+    """Run every benchmark across a ladder of maze sizes.
+
+    Args:
+        sizes: The (width, height) of the mazes to benchmark.
+        repeat: How many timed runs to keep the fastest of.
+        progress: Called with each result as soon as it is known.
+
+    Returns:
+        All results, by size then by benchmark.
+    """
+    results = []
+    for width, height in sizes:
+        for result in run_size(width, height, repeat):
+            progress(result)
+            results.append(result)
+    return results
+
+
+def compare(
+    results: List[BenchResult], baseline: List[Dict[str, Any]],
+    threshold: float
+) -> List[Tuple[BenchResult, float]]:
+    """Find the benchmarks whose throughput fell below the baseline.
+
+    Args:
+        results: The current results.
+        baseline: The results of a previous run, as stored in JSON.
+        threshold: The tolerated slowdown, e.g. 0.2 for 20%.
+
+    Returns:
+        The regressed results, each with its throughput as a fraction of
+        the baseline throughput. Benchmarks missing from the baseline are
+        not compared.
+    """
+    reference = {
+        (entry["name"], entry["width"], entry["height"]):
+            entry["cells_per_second"]
+        for entry in baseline
+    }
+    regressions = []
+    for result in results:
+        previous = reference.get((result.name, result.width, result.height))
+        if not previous:
+            continue
+        ratio = result.cells_per_second / previous
+        if ratio < 1 - threshold:
+            regressions.append((result, ratio))
+    return regressions
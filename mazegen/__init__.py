@@ -1,9 +1,13 @@
-from mazegen.cell import Cell
+from mazegen.cell import Cell, CellView
 from mazegen.maze import Maze
 from mazegen.generator import MazeGenerator
 from mazegen.pathfinder import PathFinder
 from mazegen.display import MazeDisplay
 from mazegen.config_parser import ConfigParser
+from mazegen.streaming import StreamingGenerator
+from mazegen.binary_format import MappedMaze, open_mapped
+from mazegen.chunked import ChunkedMaze
 
-__all__ = ["Cell", "Maze", "MazeGenerator", "PathFinder", "MazeDisplay",
-           "ConfigParser"]
+__all__ = ["Cell", "CellView", "Maze", "MazeGenerator", "PathFinder",
+           "MazeDisplay", "ConfigParser", "StreamingGenerator", "MappedMaze",
+           "open_mapped", "ChunkedMaze"]
@@ -0,0 +1,243 @@
+"""Module for generating many seeded mazes in parallel.
+
+Usage: python3 -m mazegen.batch <config_file> (--seeds A-B | --count N)
+       [--workers N] [--concat FILE]
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from mazegen.cache import MazeCache
+from mazegen.config_parser import ConfigParser
+from mazegen.generator import ALGORITHMS, MazeGenerator
+from mazegen.maze import Maze
+from mazegen.pathfinder import PathFinder
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# One cache per directory and worker process, reused across jobs
+CACHES: Dict[str, MazeCache] = {}
+
+
+class BatchJob(NamedTuple):
+    """Parameters of a single maze in a batch."""
+
+    width: int
+    height: int
+    entry: Tuple[int, int]
+    exit: Tuple[int, int]
+    seed: int
+    perfect: bool
+    algorithm: str
+    output_file: Optional[str]
+    loop_percentage: float = 0.15
+    cache_dir: Optional[str] = None
+
+
+class BatchResult(NamedTuple):
+    """Outcome of a single maze in a batch."""
+
+    seed: int
+    solved: bool
+    text: Optional[str]
+    seconds: float
+
+
+def build_maze(job: BatchJob) -> BatchResult:
+    """Generate, solve and serialize one maze.
+
+    Runs inside a worker process. The maze is written to
+    job.output_file when one is given, otherwise its hex text is returned
+    so the parent can concatenate results in seed order. With a
+    job.cache_dir, a maze built earlier with the same parameters is read
+    back from the cache instead.
+
+    Args:
+        job: The parameters of the maze to build.
+
+    Returns:
+        The seed, whether a path was found, the hex text (or None when
+        written to a file) and the time spent.
+
+    Raises:
+        ValueError: If the generator rejects the entry or exit.
+    """
+    started = time.perf_counter()
+    try:
+        if job.cache_dir:
+            maze, path, _ = open_cache(job.cache_dir).generate(
+                job.width, job.height, job.entry, job.exit, job.seed,
+                job.perfect, job.algorithm, job.loop_percentage)
+        else:
+            maze = Maze(job.width, job.height, job.entry, job.exit)
+            generator = MazeGenerator(maze, seed=job.seed,
+                                      algorithm=job.algorithm)
+            generator.generate(perfect=job.perfect,
+                               loop_percentage=job.loop_percentage)
+            path = PathFinder(maze).find_path(job.entry, job.exit)
+    except SystemExit as e:
+        raise ValueError(f"seed {job.seed}: {e}") from None
+
+    text = None
+    if job.output_file:
+        maze.to_file(job.output_file, path or [])
+    else:
+        buffer = io.StringIO()
+        maze.write(buffer, path or [])
+        text = buffer.getvalue()
+    return BatchResult(job.seed, path is not None, text,
+                       time.perf_counter() - started)
+
+
+def open_cache(directory: str) -> MazeCache:
+    """Return this process's cache for a directory, opening it once.
+
+    Args:
+        directory: The cache directory.
+
+    Returns:
+        The cache.
+    """
+    if directory not in CACHES:
+        CACHES[directory] = MazeCache(directory)
+    return CACHES[directory]
+
+
+def seed_output_file(output_file: str, seed: int) -> str:
+    """Derive the per-seed output file name from OUTPUT_FILE.
+
+    Args:
+        output_file: The OUTPUT_FILE value, e.g. 'maze.txt'.
+        seed: The seed of the maze.
+
+    Returns:
+        The file name with the seed inserted, e.g. 'maze_42.txt'.
+    """
+    base, ext = os.path.splitext(output_file)
+    return f"{base}_{seed}{ext}"
+
+
+def run_batch(
+    jobs: List[BatchJob], workers: Optional[int] = None,
+    concat_file: Optional[str] = None
+) -> List[BatchResult]:
+    """Build a list of mazes across a process pool.
+
+    Args:
+        jobs: The mazes to build.
+        workers: Number of worker processes (default: CPU count).
+        concat_file: If given, every maze is appended to this single file,
+            each preceded by a '# seed N' line, in job order.
+
+    Returns:
+        The results of all jobs, in job order.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(jobs) // (workers * 4))
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        outcomes = pool.map(build_maze, jobs, chunksize=chunksize)
+        if concat_file:
+            with open(concat_file, "w") as f:
+                for result in outcomes:
+                    f.write(f"# seed {result.seed}\n")
+                    f.write(result.text or "")
+                    results.append(result._replace(text=None))
+        else:
+            results = list(outcomes)
+    return results
+
+
+def parse_seeds(args: argparse.Namespace, base_seed: int) -> range:
+    """Turn the --seeds or --count option into a range of seeds.
+
+    Args:
+        args: The parsed command line.
+        base_seed: The first seed used with --count (the config SEED).
+
+    Returns:
+        The range of seeds to generate.
+
+    Raises:
+        ValueError: If --seeds is not of the form 'A-B'.
+    """
+    if args.count is not None:
+        return range(base_seed, base_seed + args.count)
+    parts = args.seeds.split("-")
+    if len(parts) != 2:
+        raise ValueError(f"Invalid seed range: {args.seeds}")
+    return range(int(parts[0]), int(parts[1]) + 1)
+
+
+def main() -> None:
+    """Parse the command line, run the batch and print a summary."""
+    parser = argparse.ArgumentParser(
+        prog="python3 -m mazegen.batch",
+        description="Generate, solve and write many seeded mazes.",
+    )
+    parser.add_argument("config", help="maze configuration file")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--seeds", help="inclusive seed range, e.g. 0-999")
+    group.add_argument("--count", type=int,
+                       help="number of seeds starting at the config SEED")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: CPU count)")
+    parser.add_argument("--concat", metavar="FILE", default=None,
+                        help="write all mazes to one file instead")
+    args = parser.parse_args()
+
+    try:
+        config = ConfigParser(args.config)
+        width = config.get_int("WIDTH")
+        height = config.get_int("HEIGHT")
+        entry = config.get_tuple("ENTRY")
+        exit_pos = config.get_tuple("EXIT")
+        output_file = config.get("OUTPUT_FILE")
+        if not output_file and not args.concat:
+            raise KeyError("Missing OUTPUT_FILE key")
+        base_seed = config.get_int("SEED") if config.get("SEED") else 0
+        perfect = config.get_bool("PERFECT")
+        algorithm = config.get("ALGORITHM", "backtracker")
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown ALGORITHM: {algorithm}")
+        loop_percentage = config.get_float("LOOP_PERCENTAGE", 0.15)
+        if not 0 <= loop_percentage <= 1:
+            raise ValueError("LOOP_PERCENTAGE must be between 0 and 1")
+        cache_dir = config.get("CACHE_DIR")
+        seeds = parse_seeds(args, base_seed)
+        if not seeds:
+            raise ValueError("Empty seed range")
+    except (FileNotFoundError, ValueError, KeyError) as e:
+        print(f"Configuration Error: {e}")
+        sys.exit(1)
+
+    jobs = [
+        BatchJob(width, height, entry, exit_pos, seed, perfect, algorithm,
+                 None if args.concat or not output_file
+                 else seed_output_file(output_file, seed),
+                 loop_percentage, cache_dir)
+        for seed in seeds
+    ]
+
+    started = time.perf_counter()
+    try:
+        results = run_batch(jobs, args.workers, args.concat)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - started
+
+    unsolved = [result.seed for result in results if not result.solved]
+    cells = width * height * len(results)
+    print(f"Generated {len(results)} mazes in {elapsed:.2f}s "
+          f"({len(results) / elapsed:,.1f} mazes/s, "
+          f"{cells / elapsed:,.0f} cells/s)")
+    if unsolved:
+        print(f"No path found for {len(unsolved)} seed(s): "
+              f"{unsolved[:10]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,441 @@
+"""Module for the compact binary maze format and its memory-mapped reader.
+
+Layout (little-endian):
+    header   48 bytes: magic b"AMZB", version, flags (bit 0: has seed,
+             bit 1: has costs), reserved, width, height, entry x/y,
+             exit x/y, seed, path length
+    walls    two cells per byte, cell i in the low nibble of byte i // 2
+             when i is even and in the high nibble otherwise
+    costs    only for weighted mazes: one byte (1-255) per cell
+    path     four moves per byte, 2 bits each (N=0, E=1, S=2, W=3),
+             move k at bits 2 * (k % 4) of byte k // 4
+"""
+
+import mmap
+import struct
+from mazegen.maze import HEX_VALUES, Maze
+from typing import BinaryIO, List, Optional, Tuple
+
+MAGIC = b"AMZB"
+VERSION = 1
+HAS_SEED = 1
+HAS_COSTS = 2
+HEADER = struct.Struct("<4sBBHIIIIIIqQ")
+MIN_SEED = -(1 << 63)
+MAX_SEED = (1 << 63) - 1
+
+MOVES = "NESW"
+LOW_NIBBLE = bytes(v & 0x0F for v in range(256))
+HIGH_NIBBLE = bytes(v >> 4 for v in range(256))
+SHIFT_NIBBLE = bytes((v << 4) & 0xF0 for v in range(256))
+
+
+def pack_nibbles(cells: bytes) -> bytes:
+    """Pack one 4-bit value per byte into two values per byte.
+
+    Args:
+        cells: The values to pack, each in the range 0-15.
+
+    Returns:
+        The packed bytes, padded with a zero nibble for odd lengths.
+    """
+    low = cells[0::2]
+    high = cells[1::2].translate(SHIFT_NIBBLE)
+    if len(high) < len(low):
+        high += b"\x00"
+    packed = int.from_bytes(low, "little") | int.from_bytes(high, "little")
+    return packed.to_bytes(len(low), "little")
+
+
+def unpack_nibbles(packed: bytes, count: int) -> bytearray:
+    """Expand packed nibbles back to one value per byte.
+
+    Args:
+        packed: The packed bytes.
+        count: The number of values to return.
+
+    Returns:
+        A bytearray of count values in the range 0-15.
+    """
+    cells = bytearray(len(packed) * 2)
+    cells[0::2] = packed.translate(LOW_NIBBLE)
+    cells[1::2] = packed.translate(HIGH_NIBBLE)
+    del cells[count:]
+    return cells
+
+
+def pack_path(path: List[str]) -> bytes:
+    """Pack a list of moves at four moves per byte.
+
+    Args:
+        path: List of direction characters ('N', 'E', 'S', 'W').
+
+    Returns:
+        The packed moves.
+    """
+    packed = bytearray((len(path) + 3) // 4)
+    for step, move in enumerate(path):
+        packed[step >> 2] |= MOVES.index(move) << ((step & 3) * 2)
+    return bytes(packed)
+
+
+def unpack_path(packed: bytes, length: int) -> List[str]:
+    """Expand packed moves back to a list of direction characters.
+
+    Args:
+        packed: The packed moves.
+        length: The number of moves.
+
+    Returns:
+        List of direction characters ('N', 'E', 'S', 'W').
+    """
+    return [
+        MOVES[(packed[step >> 2] >> ((step & 3) * 2)) & 3]
+        for step in range(length)
+    ]
+
+
+def write_header(
+    stream: BinaryIO, width: int, height: int, entry: Tuple[int, int],
+    exit: Tuple[int, int], seed: Optional[int], path_length: int,
+    has_costs: bool = False
+) -> None:
+    """Write the fixed-size header of a binary maze file.
+
+    Args:
+        stream: The binary stream to write to.
+        width: The width of the maze in cells.
+        height: The height of the maze in cells.
+        entry: The (x, y) coordinates of the maze entry point.
+        exit: The (x, y) coordinates of the maze exit point.
+        seed: The seed the maze was generated from, if known.
+        path_length: The number of moves in the solution path.
+        has_costs: Whether a cost section follows the walls.
+
+    Raises:
+        ValueError: If the seed does not fit in the signed 64-bit field.
+    """
+    if seed is not None and not MIN_SEED <= seed <= MAX_SEED:
+        raise ValueError(f"Seed {seed} does not fit in 64 bits")
+    flags = ((HAS_SEED if seed is not None else 0)
+             | (HAS_COSTS if has_costs else 0))
+    stream.write(HEADER.pack(
+        MAGIC, VERSION, flags, 0,
+        width, height, entry[0], entry[1], exit[0], exit[1],
+        seed if seed is not None else 0, path_length,
+    ))
+
+
+def read_header(
+    data: bytes
+) -> Tuple[int, int, Tuple[int, int], Tuple[int, int], Optional[int], int,
+           bool]:
+    """Decode the header of a binary maze file.
+
+    Args:
+        data: At least the first HEADER.size bytes of the file.
+
+    Returns:
+        A tuple (width, height, entry, exit, seed, path_length,
+        has_costs).
+
+    Raises:
+        ValueError: If the data is not a supported binary maze file.
+    """
+    if len(data) < HEADER.size:
+        raise ValueError("Truncated binary maze header")
+    (magic, version, flags, _, width, height, entry_x, entry_y,
+     exit_x, exit_y, seed, path_length) = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a binary maze file")
+    if version != VERSION:
+        raise ValueError(f"Unsupported binary maze version: {version}")
+    return (width, height, (entry_x, entry_y), (exit_x, exit_y),
+            seed if flags & HAS_SEED else None, path_length,
+            bool(flags & HAS_COSTS))
+
+
+def write_binary(
+    maze: Maze, filepath: str, path: List[str], seed: Optional[int] = None
+) -> None:
+    """Write a maze, its cell costs if any, and its solution.
+
+    Args:
+        maze: The maze to write.
+        filepath: The path where the binary file will be written.
+        path: List of direction characters representing the solution path.
+        seed: The seed the maze was generated from, if known.
+
+    Raises:
+        ValueError: If the seed does not fit in 64 bits.
+    """
+    with open(filepath, "wb") as f:
+        write_header(f, maze.width, maze.height, maze.entry, maze.exit,
+                     seed, len(path), maze.costs is not None)
+        f.write(pack_nibbles(bytes(maze.walls)))
+        if maze.costs is not None:
+            f.write(maze.costs)
+        f.write(pack_path(path))
+
+
+def read_binary(filepath: str) -> Tuple[Maze, List[str], Optional[int]]:
+    """Load a binary maze file fully into memory.
+
+    Args:
+        filepath: The binary file to read.
+
+    Returns:
+        A tuple (maze, path, seed).
+
+    Raises:
+        ValueError: If the file is not a supported binary maze file, is
+            truncated or holds a zero cell cost.
+    """
+    with open(filepath, "rb") as f:
+        data = f.read()
+    (width, height, entry, exit, seed, path_length,
+     has_costs) = read_header(data)
+    count = width * height
+    walls_end = HEADER.size + (count + 1) // 2
+    path_start = walls_end + (count if has_costs else 0)
+    if len(data) < path_start + (path_length + 3) // 4:
+        raise ValueError("Truncated binary maze file")
+    maze = Maze(width, height, entry, exit)
+    maze.walls[:] = unpack_nibbles(data[HEADER.size:walls_end], count)
+    if has_costs:
+        maze.set_costs(data[walls_end:path_start])
+    return maze, unpack_path(data[path_start:], path_length), seed
+
+
+class NibbleGrid:
+    """Exposes nibble-packed walls inside a buffer as one value per cell.
+
+    Supports the indexing used on Maze.walls (integer get/set, plain
+    slices and len), so cell views, the pathfinder and the hex writer
+    work on it unchanged while only touching the bytes they need.
+    """
+
+    def __init__(self, buffer: mmap.mmap, offset: int, count: int):
+        """Wrap the walls section of a mapped binary file.
+
+        Args:
+            buffer: The memory-mapped file.
+            offset: The byte offset where the walls start.
+            count: The number of cells.
+        """
+        self.buffer = buffer
+        self.offset = offset
+        self.count = count
+
+    def __len__(self) -> int:
+        """Return the number of cells."""
+        return self.count
+
+    def __getitem__(self, key: int | slice) -> int | bytearray:
+        """Read one cell mask, or a run of cells for a plain slice.
+
+        Args:
+            key: A cell index, or a slice with no step.
+
+        Returns:
+            The wall mask of the cell, or a bytearray of masks.
+        """
+        if isinstance(key, slice):
+            start, stop, _ = key.indices(self.count)
+            if stop <= start:
+                return bytearray()
+            first = self.offset + start // 2
+            last = self.offset + (stop + 1) // 2
+            packed = self.buffer[first:last]
+            cells = unpack_nibbles(packed, len(packed) * 2)
+            skip = start & 1
+            return cells[skip:skip + stop - start]
+        byte = self.buffer[self.offset + (key >> 1)]
+        return byte >> 4 if key & 1 else byte & 0x0F
+
+    def __setitem__(self, key: int, value: int) -> None:
+        """Write one cell mask; the file must be mapped writable.
+
+        Args:
+            key: The cell index.
+            value: The new wall mask (0-15).
+        """
+        position = self.offset + (key >> 1)
+        byte = self.buffer[position]
+        if key & 1:
+            byte = (byte & 0x0F) | ((value & 0x0F) << 4)
+        else:
+            byte = (byte & 0xF0) | (value & 0x0F)
+        self.buffer[position] = byte
+
+
+class MappedMaze(Maze):
+    """A maze whose walls stay in a memory-mapped binary file.
+
+    Only the pages holding the cells that are actually read are loaded,
+    so get_cell on a multi-gigabyte maze costs a few page faults rather
+    than a full parse. The cell costs of a weighted maze are a view on
+    the file as well.
+    """
+
+    def __init__(self, filepath: str, writable: bool = False):
+        """Map a binary maze file.
+
+        Args:
+            filepath: The binary file to map.
+            writable: If True, wall edits are written back to the file.
+
+        Raises:
+            ValueError: If the file is not a supported binary maze file
+                or is truncated.
+        """
+        mode = "r+b" if writable else "rb"
+        access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+        with open(filepath, mode) as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=access)
+        (self.width, self.height, self.entry, self.exit, self.seed,
+         self.path_length, has_costs) = read_header(
+             self.buffer[:HEADER.size])
+        count = self.width * self.height
+        self.generation = 0
+        self.walls_end = HEADER.size + (count + 1) // 2
+        self.walls = NibbleGrid(  # type: ignore[assignment]
+            self.buffer, HEADER.size, count)
+        self.path_start = self.walls_end + (count if has_costs else 0)
+        if len(self.buffer) < self.path_start + (self.path_length + 3) // 4:
+            self.buffer.close()
+            raise ValueError("Truncated binary maze file")
+        self.costs = None
+        if has_costs:
+            self.costs = memoryview(  # type: ignore[assignment]
+                self.buffer)[self.walls_end:self.path_start]
+
+    def reset(self) -> None:
+        """Reset all cells to have all walls intact (writable maps only)."""
+        size = self.walls_end - HEADER.size
+        self.buffer[HEADER.size:self.walls_end] = b"\xff" * size
+        self.generation += 1
+
+    def read_path(self) -> List[str]:
+        """Decode the stored solution path.
+
+        Returns:
+            List of direction characters ('N', 'E', 'S', 'W').
+        """
+        end = self.path_start + (self.path_length + 3) // 4
+        return unpack_path(self.buffer[self.path_start:end],
+                           self.path_length)
+
+    def close(self) -> None:
+        """Release the memory map."""
+        if isinstance(self.costs, memoryview):
+            # The map cannot be closed while a view on it is alive
+            self.costs.release()
+        self.costs = None
+        self.buffer.close()
+
+
+def open_mapped(filepath: str, writable: bool = False) -> MappedMaze:
+    """Open a binary maze file as a memory-mapped maze.
+
+    Args:
+        filepath: The binary file to map.
+        writable: If True, wall edits are written back to the file.
+
+    Returns:
+        The mapped maze.
+    """
+    return MappedMaze(filepath, writable)
+
+
+def hex_to_binary(source: str, target: str,
+                  seed: Optional[int] = None) -> None:
+    """Convert a hex maze file to the binary format, row by row.
+
+    Args:
+        source: The hex file written by Maze.to_file.
+        target: The binary file to write.
+        seed: The seed to record, since the hex format does not store it.
+
+    Raises:
+        ValueError: If the hex file is malformed.
+    """
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        dst.write(b"\x00" * HEADER.size)
+        width = 0
+        height = 0
+        carry = b""
+        for line in src:
+            row = line.strip()
+            if not row:
+                break
+            if not width:
+                width = len(row)
+            elif len(row) != width:
+                raise ValueError(f"Row {height} has the wrong width")
+            cells = carry + row.translate(HEX_VALUES)
+            even = len(cells) & ~1
+            dst.write(pack_nibbles(cells[:even]))
+            carry = cells[even:]
+            height += 1
+        if carry:
+            dst.write(pack_nibbles(carry))
+
+        line = src.readline()
+        # Weighted mazes have a cost section before the coordinates
+        has_costs = bool(line.strip()) and b"," not in line
+        if has_costs:
+            rows = 0
+            while line.strip():
+                try:
+                    costs = bytes.fromhex(line.strip().decode("ascii"))
+                except (UnicodeDecodeError, ValueError):
+                    raise ValueError(f"Cost row {rows} is not hex") from None
+                if len(costs) != width or 0 in costs:
+                    raise ValueError(f"Cost row {rows} is invalid")
+                dst.write(costs)
+                rows += 1
+                line = src.readline()
+            if rows != height:
+                raise ValueError("The cost section has the wrong height")
+            line = src.readline()
+        entry = parse_point(line)
+        exit = parse_point(src.readline())
+        path = list(src.readline().strip().decode("ascii"))
+        dst.write(pack_path(path))
+        dst.seek(0)
+        write_header(dst, width, height, entry, exit, seed, len(path),
+                     has_costs)
+
+
+def parse_point(line: bytes) -> Tuple[int, int]:
+    """Parse an 'x,y' coordinate line.
+
+    Args:
+        line: The raw line.
+
+    Returns:
+        The (x, y) coordinates.
+
+    Raises:
+        ValueError: If the line is not two comma-separated integers.
+    """
+    parts = line.split(b",")
+    if len(parts) != 2:
+        raise ValueError(f"Invalid coordinates: {line!r}")
+    return int(parts[0]), int(parts[1])
+
+
+def binary_to_hex(source: str, target: str) -> None:
+    """Convert a binary maze file back to the hex format, row by row.
+
+    Args:
+        source: The binary file to read.
+        target: The hex file to write, identical to Maze.to_file output.
+    """
+    maze = open_mapped(source)
+    try:
+        with open(target, "w") as f:
+            maze.write(f, maze.read_path())
+    finally:
+        maze.close()
@@ -0,0 +1,272 @@
+"""Module for caching seeded mazes and their solutions on disk.
+
+A seeded generation is fully determined by its parameters, so its result
+can be stored under a hash of those parameters and read back instead of
+being generated and solved again. Entries use the binary maze format and
+are kept in a directory bounded in size, evicting the least recently
+used entries first, with a small in-memory tier in front of it. The
+directory may be shared by several processes: last use is the file
+mtime and the size is recomputed from the directory before evicting.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from mazegen.binary_format import (MAX_SEED, MIN_SEED, read_binary,
+                                   write_binary)
+from mazegen.generator import MazeGenerator, pattern_positions
+from mazegen.maze import Maze
+from mazegen.pathfinder import PathFinder
+from typing import List, NamedTuple, Optional, Tuple
+
+# Bump when generation changes, so stale entries are never served
+CACHE_VERSION = 1
+SUFFIX = ".amzb"
+
+
+class CachedMaze(NamedTuple):
+    """A generated maze with its solution and '42' pattern cells."""
+
+    maze: Maze
+    path: Optional[List[str]]
+    pattern_42_cells: List[Tuple[int, int]]
+
+
+class MazeCache:
+    """Content-addressed, size-bounded LRU cache of solved mazes.
+
+    The pattern cells are not stored: they only depend on the maze size
+    and are recomputed with pattern_positions. Mazes without a solution
+    are not cached, since the binary format cannot tell an empty path
+    from a missing one.
+    """
+
+    def __init__(
+        self, directory: str, max_bytes: int = 256 * 1024 * 1024,
+        memory_entries: int = 32
+    ):
+        """Open a cache directory, creating it if needed.
+
+        Args:
+            directory: Where the cache entries are stored.
+            max_bytes: The total size the entries on disk may take.
+            memory_entries: How many recent entries to keep in memory.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self.memory: OrderedDict[str, Tuple[bytes, List[str]]] = (
+            OrderedDict())
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self.size = sum(size for _, size, _ in self.entries())
+
+    def key(
+        self, width: int, height: int, entry: Tuple[int, int],
+        exit: Tuple[int, int], seed: int, perfect: bool,
+        algorithm: str = "backtracker", loop_percentage: float = 0.15
+    ) -> str:
+        """Hash the parameters that determine a seeded maze.
+
+        Args:
+            width: The width of the maze in cells.
+            height: The height of the maze in cells.
+            entry: The (x, y) coordinates of the maze entry point.
+            exit: The (x, y) coordinates of the maze exit point.
+            seed: The random seed.
+            perfect: Whether the maze is perfect.
+            algorithm: The name of the carving engine.
+            loop_percentage: The loop percentage of imperfect mazes.
+
+        Returns:
+            The hex digest naming the cache entry.
+        """
+        params = [CACHE_VERSION, width, height, list(entry), list(exit),
+                  seed, perfect, algorithm,
+                  loop_percentage if not perfect else None]
+        encoded = json.dumps(params).encode("ascii")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def filepath(self, key: str) -> str:
+        """Return the path of the file holding an entry.
+
+        Args:
+            key: The key of the entry.
+
+        Returns:
+            The file path inside the cache directory.
+        """
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def entries(self) -> List[Tuple[str, int, float]]:
+        """List the entries stored on disk.
+
+        Returns:
+            A list of (file path, size, last use time) tuples.
+        """
+        result = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            result.append((path, stat.st_size, stat.st_mtime))
+        return result
+
+    def remember(self, key: str, walls: bytes, path: List[str]) -> None:
+        """Put an entry in the in-memory tier, evicting the oldest.
+
+        Args:
+            key: The key of the entry.
+            walls: The wall masks of the maze.
+            path: The solution path.
+        """
+        self.memory[key] = (walls, path)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def get(
+        self, key: str, width: int, height: int, entry: Tuple[int, int],
+        exit: Tuple[int, int]
+    ) -> Optional[Tuple[Maze, List[str]]]:
+        """Look an entry up in memory, then on disk.
+
+        Args:
+            key: The key of the entry.
+            width: The width of the maze in cells.
+            height: The height of the maze in cells.
+            entry: The (x, y) coordinates of the maze entry point.
+            exit: The (x, y) coordinates of the maze exit point.
+
+        Returns:
+            A fresh maze and its path, or None on a miss.
+        """
+        filepath = self.filepath(key)
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            walls, path = self.memory[key]
+            self.touch(filepath)
+            maze = Maze(width, height, entry, exit)
+            maze.walls[:] = walls
+            return maze, list(path)
+
+        try:
+            maze, path, _ = read_binary(filepath)
+        except (FileNotFoundError, ValueError):
+            return None
+        self.touch(filepath)
+        self.remember(key, bytes(maze.walls), path)
+        return maze, list(path)
+
+    def touch(self, filepath: str) -> None:
+        """Mark an entry as just used, so eviction keeps it longest.
+
+        Args:
+            filepath: The file holding the entry.
+        """
+        try:
+            os.utime(filepath)
+        except FileNotFoundError:
+            # Evicted by another process; the memory copy stays valid
+            pass
+
+    def put(self, key: str, maze: Maze, path: List[str],
+            seed: int) -> None:
+        """Store an entry on disk and in memory, then evict if needed.
+
+        The file is written under a temporary name and renamed, so a
+        concurrent reader never sees a partial entry.
+
+        Args:
+            key: The key of the entry.
+            maze: The generated maze.
+            path: The solution path.
+            seed: The seed the maze was generated from.
+        """
+        filepath = self.filepath(key)
+        fd, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(fd)
+        try:
+            write_binary(maze, temporary, path, seed)
+            replaced = os.path.exists(filepath)
+            previous = os.path.getsize(filepath) if replaced else 0
+            os.replace(temporary, filepath)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        self.size += os.path.getsize(filepath) - previous
+        self.remember(key, bytes(maze.walls), path)
+        self.evict()
+
+    def evict(self) -> None:
+        """Delete the least recently used entries until under max_bytes.
+
+        The tracked size only counts this process's writes, so once it
+        goes over the budget the directory is scanned for the real size,
+        since other processes sharing it add and remove entries too.
+        """
+        if self.size <= self.max_bytes:
+            return
+        entries = self.entries()
+        self.size = sum(size for _, size, _ in entries)
+        entries.sort(key=lambda item: item[2])
+        for path, size, _ in entries:
+            if self.size <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            self.size -= size
+            key = os.path.basename(path)[:-len(SUFFIX)]
+            self.memory.pop(key, None)
+
+    def generate(
+        self, width: int, height: int, entry: Tuple[int, int],
+        exit: Tuple[int, int], seed: Optional[int], perfect: bool,
+        algorithm: str = "backtracker", loop_percentage: float = 0.15
+    ) -> CachedMaze:
+        """Generate and solve a maze, reusing a cached result if any.
+
+        Unseeded requests are random by design and bypass the cache, as
+        do seeds too large for the binary format.
+
+        Args:
+            width: The width of the maze in cells.
+            height: The height of the maze in cells.
+            entry: The (x, y) coordinates of the maze entry point.
+            exit: The (x, y) coordinates of the maze exit point.
+            seed: The random seed, or None for a random maze.
+            perfect: Whether the maze is perfect.
+            algorithm: The name of the carving engine.
+            loop_percentage: The loop percentage of imperfect mazes.
+
+        Returns:
+            The maze, its solution (None if there is none) and its
+            pattern cells.
+        """
+        pattern = pattern_positions(width, height)
+        key = None
+        if seed is not None and MIN_SEED <= seed <= MAX_SEED:
+            key = self.key(width, height, entry, exit, seed, perfect,
+                           algorithm, loop_percentage)
+            found = self.get(key, width, height, entry, exit)
+            if found is not None:
+                self.hits += 1
+                return CachedMaze(found[0], found[1], pattern)
+            self.misses += 1
+
+        maze = Maze(width, height, entry, exit)
+        generator = MazeGenerator(maze, seed=seed, algorithm=algorithm)
+        generator.generate(perfect=perfect, loop_percentage=loop_percentage)
+        path = PathFinder(maze).find_path(entry, exit)
+        if key is not None and seed is not None and path is not None:
+            self.put(key, maze, path, seed)
+        return CachedMaze(maze, path, generator.pattern_42_cells)
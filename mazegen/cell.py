@@ -1,5 +1,11 @@
 """Module for representing individual maze cells and their wall states."""
 
+NORTH = 1
+EAST = 2
+SOUTH = 4
+WEST = 8
+ALL_WALLS = NORTH | EAST | SOUTH | WEST
+
 
 class Cell:
     """Represents a single cell in a maze with walls on four sides.
@@ -9,6 +15,8 @@ class Cell:
     Walls are represented as True (wall exists) or False (wall is open).
     """
 
+    __slots__ = ("north", "east", "south", "west")
+
     def __init__(
         self,
         north: bool = True,
@@ -29,20 +37,40 @@ class Cell:
         self.south = south
         self.west = west
 
-    def to_hex(self) -> str:
-        """Convert cell wall state to a single hexadecimal character.
+    def to_mask(self) -> int:
+        """Convert cell wall state to a 4-bit integer mask.
 
         Returns:
-            A hex string (0-F) representing the wall state.
-            Each bit represents a wall: N=1, E=2, S=4, W=8.
+            An integer (0-15) where each bit represents a wall:
+            N=1, E=2, S=4, W=8.
         """
-        value = (
+        return (
             int(self.north)
             + int(self.east) * 2
             + int(self.south) * 4
             + int(self.west) * 8
         )
-        return format(value, "X")
+
+    def from_mask(self, mask: int) -> None:
+        """Set cell wall state from a 4-bit integer mask.
+
+        Args:
+            mask: An integer (0-15) where each bit represents a wall:
+                N=1, E=2, S=4, W=8.
+        """
+        self.north = bool(mask & NORTH)
+        self.east = bool(mask & EAST)
+        self.south = bool(mask & SOUTH)
+        self.west = bool(mask & WEST)
+
+    def to_hex(self) -> str:
+        """Convert cell wall state to a single hexadecimal character.
+
+        Returns:
+            A hex string (0-F) representing the wall state.
+            Each bit represents a wall: N=1, E=2, S=4, W=8.
+        """
+        return format(self.to_mask(), "X")
 
     def from_hex(self, hex_char: str) -> None:
         """Set cell wall state from a hexadecimal character.
@@ -51,11 +79,7 @@ class Cell:
             hex_char: A single hex character (0-F) representing wall state.
                 Each bit represents a wall: N=1, E=2, S=4, W=8.
         """
-        num = int(hex_char, 16)
-        self.north = bool(num & 1)
-        self.east = bool((num >> 1) & 1)
-        self.south = bool((num >> 2) & 1)
-        self.west = bool((num >> 3) & 1)
+        self.from_mask(int(hex_char, 16))
 
     def __str__(self) -> str:
         """Return a string representation of the cell's wall state.
@@ -65,3 +89,99 @@ class Cell:
         """
         return f"Cell(N={self.north}, E={self.east}, S={self.south},\
         W={self.west})"
+
+
+class CellView(Cell):
+    """A lightweight view of one cell stored inside a packed wall buffer.
+
+    Reading or writing a wall flag goes straight to the underlying
+    bytearray, so changes made through the view are visible to the maze
+    and to any other view of the same cell.
+    """
+
+    __slots__ = ("walls", "index")
+
+    def __init__(self, walls: bytearray, index: int):
+        """Initialize a view on a single cell of a wall buffer.
+
+        Args:
+            walls: The packed wall buffer holding one mask per cell.
+            index: The flat index (y * width + x) of the cell.
+        """
+        self.walls = walls
+        self.index = index
+
+    def get_wall(self, bit: int) -> bool:
+        """Check whether a wall bit is set for this cell.
+
+        Args:
+            bit: The wall bit to test (NORTH, EAST, SOUTH or WEST).
+
+        Returns:
+            True if the wall exists, False otherwise.
+        """
+        return bool(self.walls[self.index] & bit)
+
+    def set_wall(self, bit: int, value: bool) -> None:
+        """Set or clear a wall bit for this cell.
+
+        Args:
+            bit: The wall bit to change (NORTH, EAST, SOUTH or WEST).
+            value: True to close the wall, False to open it.
+        """
+        if value:
+            self.walls[self.index] |= bit
+        else:
+            self.walls[self.index] &= ~bit & ALL_WALLS
+
+    @property
+    def north(self) -> bool:
+        """Whether there is a wall to the north."""
+        return self.get_wall(NORTH)
+
+    @north.setter
+    def north(self, value: bool) -> None:
+        self.set_wall(NORTH, value)
+
+    @property
+    def east(self) -> bool:
+        """Whether there is a wall to the east."""
+        return self.get_wall(EAST)
+
+    @east.setter
+    def east(self, value: bool) -> None:
+        self.set_wall(EAST, value)
+
+    @property
+    def south(self) -> bool:
+        """Whether there is a wall to the south."""
+        return self.get_wall(SOUTH)
+
+    @south.setter
+    def south(self, value: bool) -> None:
+        self.set_wall(SOUTH, value)
+
+    @property
+    def west(self) -> bool:
+        """Whether there is a wall to the west."""
+        return self.get_wall(WEST)
+
+    @west.setter
+    def west(self, value: bool) -> None:
+        self.set_wall(WEST, value)
+
+    def to_mask(self) -> int:
+        """Return the 4-bit wall mask directly from the buffer.
+
+        Returns:
+            An integer (0-15) where each bit represents a wall.
+        """
+        return self.walls[self.index]
+
+    def from_mask(self, mask: int) -> None:
+        """Write a 4-bit wall mask directly into the buffer.
+
+        Args:
+            mask: An integer (0-15) where each bit represents a wall.
+        """
+        self.walls[self.index] = mask & ALL_WALLS
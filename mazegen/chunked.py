@@ -0,0 +1,293 @@
+"""Module for lazily generated mazes too large to hold in memory.
+
+The grid is cut into square chunks. A chunk is carved the first time one
+of its cells is read, by the configured engine with a seed derived from
+the master seed and the chunk position, so it comes out the same every
+time it is evicted and carved again. The chunks are joined by a tree at
+the chunk level: every chunk but the top-left one opens a single door
+into its north or its west neighbour, chosen by a hash of the master
+seed and the chunk position. Each chunk being a perfect maze of its own,
+the whole maze is perfect, and any chunk can be carved, doors included,
+without carving its neighbours.
+"""
+
+import hashlib
+import random
+from collections import OrderedDict
+from mazegen import instrument
+from mazegen.cell import NORTH, EAST, SOUTH, WEST
+from mazegen.generator import ALGORITHMS
+from mazegen.maze import Maze
+from mazegen.tiled import TileJob, carve_tile, tile_seed
+from typing import Dict, Optional, Tuple
+
+
+class ChunkGrid:
+    """Exposes the chunks of a ChunkedMaze as one value per cell.
+
+    Supports the indexing used on Maze.walls (integer get/set, plain
+    slices and len), so cell views, the pathfinder and the display work
+    on it unchanged while only carving the chunks they read.
+    """
+
+    def __init__(self, maze: "ChunkedMaze"):
+        """Wrap the chunk store of a chunked maze.
+
+        Args:
+            maze: The maze whose chunks are exposed.
+        """
+        self.maze = maze
+        self.count = maze.width * maze.height
+
+    def __len__(self) -> int:
+        """Return the number of cells."""
+        return self.count
+
+    def __getitem__(self, key: int | slice) -> int | bytearray:
+        """Read one cell mask, or a run of cells for a plain slice.
+
+        Args:
+            key: A cell index, or a slice with no step.
+
+        Returns:
+            The wall mask of the cell, or a bytearray of masks.
+
+        Raises:
+            IndexError: If the cell index is outside the maze.
+        """
+        if isinstance(key, slice):
+            start, stop, _ = key.indices(self.count)
+            return self.maze.read_run(start, stop)
+        cells, offset = self.maze.locate(key)
+        return cells[offset]
+
+    def __setitem__(self, key: int, value: int) -> None:
+        """Write one cell mask, pinning its chunk in memory.
+
+        Args:
+            key: The cell index.
+            value: The new wall mask (0-15).
+
+        Raises:
+            IndexError: If the cell index is outside the maze.
+        """
+        cells, offset = self.maze.locate(key, edit=True)
+        cells[offset] = value
+
+
+class ChunkedMaze(Maze):
+    """A maze generated chunk by chunk, on first access.
+
+    Only the chunks holding cells that are read are carved, and at most
+    max_chunks of them are kept, least recently used first out. Edited
+    chunks are pinned in memory instead, so wall edits are never lost to
+    eviction. get_cell, PathFinder and MazeDisplay (in viewport mode)
+    work on it like on a Maze. The '42' pattern is not drawn in chunked
+    mazes.
+    """
+
+    def __init__(
+        self, width: int, height: int, entry: tuple[int, int],
+        exit: tuple[int, int], seed: Optional[int] = None,
+        chunk_size: int = 64, max_chunks: int = 256,
+        algorithm: str = "backtracker"
+    ):
+        """Initialize a chunked maze; no chunk is carved yet.
+
+        Args:
+            width: The width of the maze in cells.
+            height: The height of the maze in cells.
+            entry: The (x, y) coordinates of the maze entry point.
+            exit: The (x, y) coordinates of the maze exit point.
+            seed: The master seed (default: a random one, fixed for the
+                lifetime of the maze).
+            chunk_size: The width and height of a chunk in cells.
+            max_chunks: How many unedited chunks to keep in memory.
+            algorithm: Name of the carving engine used inside chunks.
+
+        Raises:
+            ValueError: If a size is not positive or the algorithm is not
+                registered.
+        """
+        if min(width, height, chunk_size, max_chunks) < 1:
+            raise ValueError("Chunked maze sizes must be positive")
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown maze algorithm: {algorithm}")
+        self.width = width
+        self.height = height
+        self.entry = entry
+        self.exit = exit
+        self.seed = seed if seed is not None else random.getrandbits(63)
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.algorithm = algorithm
+        self.chunks: OrderedDict[Tuple[int, int], bytearray] = OrderedDict()
+        self.pinned: Dict[Tuple[int, int], bytearray] = {}
+        self.last_key: Optional[Tuple[int, int]] = None
+        self.last_cells = bytearray()
+        self.chunks_generated = 0
+        self.costs = None
+        self.generation = 0
+        self.walls = ChunkGrid(self)  # type: ignore[assignment]
+
+    def reset(self) -> None:
+        """Drop every chunk and wall edit.
+
+        A chunked maze has no all-walls state to go back to: cells return
+        to their generated walls, carved again on next access.
+        """
+        self.chunks.clear()
+        self.pinned.clear()
+        self.last_key = None
+        self.last_cells = bytearray()
+        self.generation += 1
+
+    def extent(self, column: int, row: int) -> Tuple[int, int]:
+        """Return the size of a chunk, smaller along the maze edges.
+
+        Args:
+            column: The column of the chunk.
+            row: The row of the chunk.
+
+        Returns:
+            The width and height of the chunk in cells.
+        """
+        size = self.chunk_size
+        return (min(size, self.width - column * size),
+                min(size, self.height - row * size))
+
+    def door(self, column: int, row: int) -> Optional[Tuple[int, int]]:
+        """Find the door a chunk opens towards the top-left chunk.
+
+        Chunks of the top row open west and chunks of the left column
+        open north; the others pick a side from the hash.
+
+        Args:
+            column: The column of the chunk.
+            row: The row of the chunk.
+
+        Returns:
+            A tuple (NORTH or WEST, offset of the door cell along that
+            side), or None for the top-left chunk.
+        """
+        if column == 0 and row == 0:
+            return None
+        text = f"{self.seed}:{column}:{row}:door"
+        value = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8],
+                               "little")
+        width, height = self.extent(column, row)
+        if row == 0 or (column > 0 and value & 1):
+            return WEST, (value >> 1) % height
+        return NORTH, (value >> 1) % width
+
+    def carve_chunk(self, column: int, row: int) -> bytearray:
+        """Carve a chunk and open its doors and those of its neighbours.
+
+        Args:
+            column: The column of the chunk.
+            row: The row of the chunk.
+
+        Returns:
+            The wall masks of the chunk, row-major with a row stride of
+            chunk_size cells.
+        """
+        size = self.chunk_size
+        width, height = self.extent(column, row)
+        job = TileJob(width, height, [], tile_seed(self.seed, column, row),
+                      self.algorithm)
+        walls = carve_tile(job).walls
+        cells = bytearray(size * size)
+        for y in range(height):
+            cells[y * size:y * size + width] = (
+                walls[y * width:(y + 1) * width])
+
+        door = self.door(column, row)
+        if door is not None:
+            side, offset = door
+            if side == NORTH:
+                cells[offset] &= ~NORTH
+            else:
+                cells[offset * size] &= ~WEST
+        # The east and south neighbours may open their door into us
+        if (column + 1) * size < self.width:
+            door = self.door(column + 1, row)
+            if door is not None and door[0] == WEST:
+                cells[door[1] * size + width - 1] &= ~EAST
+        if (row + 1) * size < self.height:
+            door = self.door(column, row + 1)
+            if door is not None and door[0] == NORTH:
+                cells[(height - 1) * size + door[1]] &= ~SOUTH
+        return cells
+
+    def chunk(self, column: int, row: int, edit: bool = False) -> bytearray:
+        """Return the cells of a chunk, carving it if it is not in memory.
+
+        Args:
+            column: The column of the chunk.
+            row: The row of the chunk.
+            edit: If True, pin the chunk so that it is never evicted.
+
+        Returns:
+            The wall masks of the chunk, as returned by carve_chunk.
+        """
+        key = (column, row)
+        if key == self.last_key and not edit:
+            return self.last_cells
+        cells = self.pinned.get(key)
+        if cells is None:
+            cells = self.chunks.get(key)
+            if cells is None:
+                cells = self.carve_chunk(column, row)
+                self.chunks[key] = cells
+                self.chunks_generated += 1
+                instrument.count("chunked.chunks_generated")
+                while len(self.chunks) > self.max_chunks:
+                    self.chunks.popitem(last=False)
+            else:
+                self.chunks.move_to_end(key)
+            if edit:
+                self.pinned[key] = self.chunks.pop(key)
+        self.last_key = key
+        self.last_cells = cells
+        return cells
+
+    def locate(self, index: int, edit: bool = False) -> Tuple[bytearray, int]:
+        """Find the chunk holding a cell and the cell offset inside it.
+
+        Args:
+            index: The flat index of the cell.
+            edit: If True, pin the chunk so that it is never evicted.
+
+        Returns:
+            A tuple (chunk cells, offset of the cell in them).
+
+        Raises:
+            IndexError: If the cell index is outside the maze.
+        """
+        if not 0 <= index < self.width * self.height:
+            raise IndexError(f"Cell index {index} is outside the maze")
+        y, x = divmod(index, self.width)
+        size = self.chunk_size
+        cells = self.chunk(x // size, y // size, edit)
+        return cells, (y % size) * size + x % size
+
+    def read_run(self, start: int, stop: int) -> bytearray:
+        """Read the masks of consecutive cells, chunk segment by segment.
+
+        Args:
+            start: The flat index of the first cell.
+            stop: The flat index after the last cell.
+
+        Returns:
+            The wall mask of each cell, in index order.
+        """
+        size = self.chunk_size
+        result = bytearray()
+        while start < stop:
+            y, x = divmod(start, self.width)
+            run = min(stop - start, self.width - x, size - x % size)
+            cells = self.chunk(x // size, y // size)
+            offset = (y % size) * size + x % size
+            result += cells[offset:offset + run]
+            start += run
+        return result
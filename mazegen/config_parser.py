@@ -24,6 +24,25 @@ class ConfigParser:
         self.config: dict[str, str] = {}
         self.parse()
 
+    @classmethod
+    def from_mapping(
+        cls, values: dict[str, str], source: str = "<mapping>"
+    ) -> "ConfigParser":
+        """Build a parser from key/value pairs that were not read from a file.
+
+        Args:
+            values: The configuration keys and their string values.
+            source: A name for the origin of the values, used as filepath.
+
+        Returns:
+            A parser whose getters read the given values.
+        """
+        parser = cls.__new__(cls)
+        parser.filepath = source
+        parser.config = {key.strip(): value.strip()
+                         for key, value in values.items()}
+        return parser
+
     def parse(self) -> None:
         """Parse the configuration file and populate the config dictionary.
 
@@ -84,6 +103,28 @@ class ConfigParser:
             raise KeyError(f"Missing key: {key}")
         return int(value)
 
+    def get_float(self, key: str, default: Optional[float] = None) -> float:
+        """Get a configuration value as a float.
+
+        Args:
+            key: The configuration key to retrieve.
+            default: Value returned when the key is absent (default: None,
+                meaning the key is required).
+
+        Returns:
+            The float value of the configuration parameter.
+
+        Raises:
+            KeyError: If the key is missing and no default is given.
+            ValueError: If the value cannot be converted to a float.
+        """
+        value = self.config.get(key)
+        if value is None:
+            if default is None:
+                raise KeyError(f"Missing key: {key}")
+            return default
+        return float(value)
+
     def get_bool(self, key: str) -> bool:
         """Get a configuration value as a boolean.
 
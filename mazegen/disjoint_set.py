@@ -0,0 +1,60 @@
+"""Module for a disjoint-set (union-find) structure over flat indices."""
+
+from array import array
+
+
+class DisjointSet:
+    """Tracks a partition of the integers 0..size-1 into disjoint sets.
+
+    Uses path compression and union by rank, so any sequence of
+    operations runs in near-constant amortized time per call. Parents are
+    kept in an integer array and ranks in a bytearray to stay compact on
+    very large grids.
+    """
+
+    def __init__(self, size: int):
+        """Initialize every element as its own singleton set.
+
+        Args:
+            size: The number of elements.
+        """
+        self.parent = array("q", range(size))
+        self.rank = bytearray(size)
+
+    def find(self, item: int) -> int:
+        """Find the representative of the set containing an element.
+
+        Args:
+            item: The element to look up.
+
+        Returns:
+            The representative element of its set.
+        """
+        parent = self.parent
+        root = item
+        while parent[root] != root:
+            root = parent[root]
+        while parent[item] != root:
+            parent[item], item = root, parent[item]
+        return root
+
+    def union(self, first: int, second: int) -> bool:
+        """Merge the sets containing two elements.
+
+        Args:
+            first: An element of the first set.
+            second: An element of the second set.
+
+        Returns:
+            True if the sets were merged, False if already the same set.
+        """
+        first = self.find(first)
+        second = self.find(second)
+        if first == second:
+            return False
+        if self.rank[first] < self.rank[second]:
+            first, second = second, first
+        self.parent[second] = first
+        if self.rank[first] == self.rank[second]:
+            self.rank[first] += 1
+        return True
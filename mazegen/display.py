@@ -1,7 +1,11 @@
 """Module for rendering and displaying mazes in the terminal."""
 
+import shutil
+import sys
+from mazegen import instrument
+from mazegen.cell import NORTH, EAST, SOUTH, WEST
 from mazegen.maze import Maze
-from typing import List, Set, Tuple, Optional
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
 
 class MazeDisplay:
@@ -17,6 +21,8 @@ class MazeDisplay:
     EXIT_COLOR = "\033[91m"
     PATTERN_COLOR = "\033[45m"
     RESET = "\033[0m"
+    CLEAR = "\033[2J\033[H"
+    COST_LABELS = [f"{cost:^3}" for cost in range(256)]
 
     def __init__(
         self, maze: Maze,
@@ -32,6 +38,7 @@ class MazeDisplay:
         self.maze = maze
         self.show_path = False
         self.show_pattern = True
+        self.show_costs = True
         self.path_cells: Set[Tuple[int, int]] = set()
         self.pattern_42_cells = pattern_42_cells if pattern_42_cells else set()
         self.wall_color = self.WALL_COLOR
@@ -40,13 +47,58 @@ class MazeDisplay:
         self.exit_color = self.EXIT_COLOR
         self.pattern_color = self.PATTERN_COLOR
 
+        self.path_rows: Dict[int, List[int]] = {}
+        self.pattern_rows = self.index_rows(self.pattern_42_cells)
+        self.row_lines: List[Optional[str]] = []
+        self.row_parts: List[List[str]] = []
+        self.screen: Optional[List[List[str]]] = None
+        self.divider_lines: List[Optional[str]] = []
+        self.top_line: Optional[str] = None
+        self.bottom_line: Optional[str] = None
+        self.drawn_maze: Optional[Maze] = None
+        self.drawn_generation = -1
+        self.drawn_costs = False
+        self.drawn_colors: Tuple[str, ...] = ()
+        self.glyph_color: Optional[str] = None
+        self.top_glyphs: List[str] = []
+        self.divider_glyphs: List[str] = []
+        self.bottom_glyphs: List[str] = []
+        self.west_glyphs: List[str] = []
+        self.east_glyphs: List[str] = []
+        self.empty_glyphs: List[str] = []
+        self.viewport = False
+        self.view_x = 0
+        self.view_y = 0
+        self.view_width = maze.width
+        self.view_height = maze.height
+
+    def index_rows(
+        self, cells: Set[Tuple[int, int]]
+    ) -> Dict[int, List[int]]:
+        """Group a set of cells by row.
+
+        Args:
+            cells: Set of (x, y) coordinates.
+
+        Returns:
+            A dictionary mapping each row index to the x-coordinates of
+            the given cells in that row.
+        """
+        rows: Dict[int, List[int]] = {}
+        for x, y in cells:
+            rows.setdefault(y, []).append(x)
+        return rows
+
     def set_pattern(self, pattern_cells: Set[Tuple[int, int]]) -> None:
         """Update the set of cells that form the '42' pattern.
 
         Args:
             pattern_cells: New set of (x, y) coordinates for the pattern.
         """
+        self.invalidate_rows(self.pattern_rows)
         self.pattern_42_cells = pattern_cells if pattern_cells else set()
+        self.pattern_rows = self.index_rows(self.pattern_42_cells)
+        self.invalidate_rows(self.pattern_rows)
 
     def set_path(self, path: List[str]) -> None:
         """Set the solution path to display.
@@ -55,6 +107,7 @@ class MazeDisplay:
             path: List of direction characters ('N', 'E', 'S', 'W')
                  representing the path from entry to exit.
         """
+        self.invalidate_rows(self.path_rows)
         self.path_cells = set()
         x, y = self.maze.entry
         self.path_cells.add((x, y))
@@ -72,13 +125,22 @@ class MazeDisplay:
             if self.maze.is_valid_position(x, y):
                 self.path_cells.add((x, y))
 
+        self.path_rows = self.index_rows(self.path_cells)
+        self.invalidate_rows(self.path_rows)
+
     def toggle_path(self) -> None:
         """Toggle the visibility of the solution path."""
         self.show_path = not self.show_path
+        self.invalidate_rows(self.path_rows)
 
     def toggle_pattern(self) -> None:
         """Toggle the visibility of the '42' pattern."""
         self.show_pattern = not self.show_pattern
+        self.invalidate_rows(self.pattern_rows)
+
+    def toggle_costs(self) -> None:
+        """Toggle the cell costs of weighted mazes."""
+        self.show_costs = not self.show_costs
 
     def set_wall_color(self, color: str) -> None:
         """Set the ANSI color code for walls.
@@ -88,37 +150,427 @@ class MazeDisplay:
         """
         self.wall_color = color
 
+    def invalidate(self) -> None:
+        """Drop every cached line so the next frame is rendered afresh."""
+        self.row_lines = [None] * self.maze.height
+        self.row_parts = [[] for _ in range(self.maze.height)]
+        self.divider_lines = [None] * self.maze.height
+        self.top_line = None
+        self.bottom_line = None
+
+    def invalidate_rows(self, rows: Iterable[int]) -> None:
+        """Drop the cached cell lines of some rows.
+
+        Args:
+            rows: The indices of the rows to render again.
+        """
+        for y in rows:
+            if 0 <= y < len(self.row_lines):
+                self.row_lines[y] = None
+
+    def build_glyphs(self) -> None:
+        """Build the per-wall-mask glyph tables for the current wall color.
+
+        Each table has 16 entries indexed by a cell's wall mask, so a row
+        is drawn with one lookup per cell instead of four wall tests.
+        """
+        wall = f"{self.wall_color}│{self.RESET}"
+        self.top_glyphs = []
+        self.divider_glyphs = []
+        self.bottom_glyphs = []
+        self.west_glyphs = []
+        self.east_glyphs = []
+        for mask in range(16):
+            north = "───" if mask & NORTH else "   "
+            south = "───" if mask & SOUTH else "   "
+            self.top_glyphs.append(north + ("┬" if mask & EAST else "─"))
+            self.divider_glyphs.append(south + "┼")
+            self.bottom_glyphs.append(south + "┴")
+            self.west_glyphs.append(wall if mask & WEST else " ")
+            self.east_glyphs.append(wall if mask & EAST else " ")
+        self.empty_glyphs = [glyph + "   " for glyph in self.west_glyphs]
+        self.glyph_color = self.wall_color
+
+    def refresh_cache(self) -> bool:
+        """Invalidate the cached lines made stale since the last frame.
+
+        Compares the maze generation and the colors against those the
+        cache was built with, so regenerating the maze, editing a wall or
+        changing a color attribute directly is picked up without an
+        explicit call.
+
+        Returns:
+            True if the whole cache was dropped.
+        """
+        maze = self.maze
+        colors = (self.wall_color, self.entry_color, self.exit_color,
+                  str(maze.entry), str(maze.exit))
+        costs = self.show_costs and maze.costs is not None
+        rebuilt = False
+        if (colors != self.drawn_colors[:5] or maze is not self.drawn_maze
+                or maze.generation != self.drawn_generation
+                or costs != self.drawn_costs
+                or len(self.row_lines) != maze.height):
+            self.invalidate()
+            rebuilt = True
+        elif self.drawn_colors[5:] != (self.path_color, self.pattern_color):
+            if self.path_color != self.drawn_colors[5]:
+                self.invalidate_rows(self.path_rows)
+            if self.pattern_color != self.drawn_colors[6]:
+                self.invalidate_rows(self.pattern_rows)
+        if self.glyph_color != self.wall_color:
+            self.build_glyphs()
+        self.drawn_maze = maze
+        self.drawn_generation = maze.generation
+        self.drawn_costs = costs
+        self.drawn_colors = colors + (self.path_color, self.pattern_color)
+        return rebuilt
+
+    def row_masks(
+        self, y: int, start: int = 0, stop: Optional[int] = None
+    ) -> bytes:
+        """Read the wall masks of a row, or of a run of cells in it.
+
+        Args:
+            y: The row index.
+            start: The first x-coordinate to read.
+            stop: The x-coordinate after the last one read (default: the
+                maze width).
+
+        Returns:
+            The wall mask of each cell read.
+        """
+        width = self.maze.width
+        stop = width if stop is None else stop
+        return bytes(self.maze.walls[y * width + start:y * width + stop])
+
+    def cell_parts(self, y: int, start: int, masks: bytes) -> List[str]:
+        """Render a run of cells of a row, each with its west wall.
+
+        Args:
+            y: The row index.
+            start: The x-coordinate of the first cell.
+            masks: The wall masks of the cells, as read by row_masks.
+
+        Returns:
+            One string per cell, four terminal columns wide.
+        """
+        stop = start + len(masks)
+        costs = self.maze.costs
+        if self.show_costs and costs is not None:
+            first = y * self.maze.width + start
+            parts = [self.west_glyphs[mask] + self.COST_LABELS[cost]
+                     for mask, cost in zip(masks,
+                                           costs[first:first + len(masks)])]
+        else:
+            parts = [self.empty_glyphs[mask] for mask in masks]
+        # Later overlays take precedence over earlier ones
+        overlays: List[Tuple[Sequence[int], str]] = []
+        if self.show_path:
+            overlays.append((self.path_rows.get(y, ()),
+                             f"{self.path_color} · {self.RESET}"))
+        if self.show_pattern:
+            overlays.append((self.pattern_rows.get(y, ()),
+                             f"{self.pattern_color}   {self.RESET}"))
+        for (x, row), color, label in (
+            (self.maze.exit, self.exit_color, " E "),
+            (self.maze.entry, self.entry_color, " S "),
+        ):
+            if row == y:
+                overlays.append(((x,), f"{color}{label}{self.RESET}"))
+        for cells, content in overlays:
+            for x in cells:
+                if start <= x < stop:
+                    x -= start
+                    parts[x] = self.west_glyphs[masks[x]] + content
+        return parts
+
+    def edge_line(
+        self, glyphs: List[str], masks: bytes, left: str, right: str
+    ) -> str:
+        """Render a border or divider line from a glyph table.
+
+        Args:
+            glyphs: The glyph table, indexed by wall mask.
+            masks: The wall masks of the cells along the line.
+            left: The character closing the line on the left.
+            right: The character closing the line on the right.
+
+        Returns:
+            The rendered line, without a trailing newline.
+        """
+        # The last glyph ends with a separator the right edge replaces
+        inner = "".join([glyphs[mask] for mask in masks])
+        return f"{self.wall_color}{left}{inner[:-1]}{right}{self.RESET}"
+
+    def row_line(self, y: int) -> str:
+        """Return the cell line of a row, rendering it if not cached.
+
+        Args:
+            y: The row index.
+
+        Returns:
+            The rendered line, without a trailing newline.
+        """
+        line = self.row_lines[y]
+        if line is not None:
+            return line
+
+        if instrument.ENABLED:
+            instrument.count("display.rows_rendered")
+        masks = self.row_masks(y)
+        parts = self.cell_parts(y, 0, masks)
+        parts.append(self.east_glyphs[masks[-1]])
+        line = "".join(parts)
+        self.row_lines[y] = line
+        self.row_parts[y] = parts
+        return line
+
+    def divider_line(self, y: int) -> str:
+        """Return the divider below a row, rendering it if not cached.
+
+        Args:
+            y: The row index (used to determine wall positions).
+
+        Returns:
+            The rendered line, without a trailing newline.
+        """
+        line = self.divider_lines[y]
+        if line is None:
+            line = self.edge_line(self.divider_glyphs, self.row_masks(y),
+                                  "├", "┤")
+            self.divider_lines[y] = line
+        return line
+
+    def border_line(self, top: bool) -> str:
+        """Return the top or bottom border, rendering it if not cached.
+
+        Args:
+            top: True for the top border, False for the bottom one.
+
+        Returns:
+            The rendered line, without a trailing newline.
+        """
+        if top:
+            if self.top_line is None:
+                self.top_line = self.edge_line(
+                    self.top_glyphs, self.row_masks(0), "┌", "┐")
+            return self.top_line
+        if self.bottom_line is None:
+            self.bottom_line = self.edge_line(
+                self.bottom_glyphs, self.row_masks(self.maze.height - 1),
+                "└", "┘")
+        return self.bottom_line
+
+    def render(self) -> str:
+        """Render the complete maze into a single frame string.
+
+        Only rows invalidated since the previous frame are rendered again;
+        the others are reused from the cache.
+
+        Returns:
+            The frame, one terminal line per maze line, newline-terminated.
+        """
+        self.refresh_cache()
+        return self.render_frame()
+
+    def render_frame(self) -> str:
+        """Assemble the frame from the cache, rendering missing lines.
+
+        Returns:
+            The frame, one terminal line per maze line, newline-terminated.
+        """
+        lines = [self.border_line(True)]
+        last = self.maze.height - 1
+        for y in range(self.maze.height):
+            lines.append(self.row_line(y))
+            if y < last:
+                lines.append(self.divider_line(y))
+        lines.append(self.border_line(False))
+        lines.append("")
+        return "\n".join(lines)
+
+    def fits_terminal(self, footer: int = 0) -> bool:
+        """Check whether the whole maze fits in the terminal.
+
+        Args:
+            footer: The number of lines the caller prints below the maze.
+
+        Returns:
+            True if the full frame and the footer fit on screen.
+        """
+        size = shutil.get_terminal_size()
+        return (4 * self.maze.width + 1 <= size.columns
+                and 2 * self.maze.height + 1 + footer <= size.lines)
+
+    def fit_view(self, footer: int = 0) -> None:
+        """Size the viewport to the terminal and keep it inside the maze.
+
+        Args:
+            footer: The number of lines the caller prints below the maze.
+        """
+        size = shutil.get_terminal_size()
+        # Each cell takes 4 columns and 2 lines, plus one closing column,
+        # one closing line and the status line
+        self.view_width = max(1, min(self.maze.width,
+                                     (size.columns - 1) // 4))
+        self.view_height = max(1, min(self.maze.height,
+                                      (size.lines - 2 - footer) // 2))
+        self.move_view(self.view_x, self.view_y)
+
+    def move_view(self, x: int, y: int) -> None:
+        """Place the top-left corner of the viewport, clamped to the maze.
+
+        Args:
+            x: The x-coordinate of the first visible column.
+            y: The y-coordinate of the first visible row.
+        """
+        self.view_x = max(0, min(x, self.maze.width - self.view_width))
+        self.view_y = max(0, min(y, self.maze.height - self.view_height))
+
+    def pan(self, dx: int, dy: int) -> None:
+        """Scroll the viewport by a number of cells.
+
+        Args:
+            dx: Cells to scroll right (negative for left).
+            dy: Cells to scroll down (negative for up).
+        """
+        self.move_view(self.view_x + dx, self.view_y + dy)
+
+    def center_on(self, x: int, y: int) -> None:
+        """Scroll the viewport so that a cell is as central as possible.
+
+        Args:
+            x: The x-coordinate of the cell.
+            y: The y-coordinate of the cell.
+        """
+        self.move_view(x - self.view_width // 2, y - self.view_height // 2)
+
+    def render_view(self) -> str:
+        """Render only the cells inside the viewport.
+
+        Reads and draws just the visible window, so the cost depends on
+        the terminal size and not on the size of the maze. A status line
+        below the frame tells which part of the maze is shown.
+
+        Returns:
+            The frame, one terminal line per maze line, newline-terminated.
+        """
+        if self.glyph_color != self.wall_color:
+            self.build_glyphs()
+        start, top = self.view_x, self.view_y
+        stop = start + self.view_width
+        bottom = top + self.view_height
+
+        lines = [self.edge_line(self.top_glyphs,
+                                self.row_masks(top, start, stop), "┌", "┐")]
+        for y in range(top, bottom):
+            masks = self.row_masks(y, start, stop)
+            parts = self.cell_parts(y, start, masks)
+            parts.append(self.east_glyphs[masks[-1]])
+            lines.append("".join(parts))
+            if y < bottom - 1:
+                lines.append(self.edge_line(self.divider_glyphs, masks,
+                                            "├", "┤"))
+            else:
+                lines.append(self.edge_line(self.bottom_glyphs, masks,
+                                            "└", "┘"))
+        lines.append(f"Columns {start}-{stop - 1}, rows {top}-{bottom - 1} "
+                     f"of {self.maze.width}x{self.maze.height}")
+        lines.append("")
+        return "\n".join(lines)
+
+    @instrument.timed("display")
     def display(self) -> None:
         """Render and print the complete maze to the terminal."""
-        self.print_top_border()
+        self.screen = None
+        self.write(self.render())
 
-        for y in range(self.maze.height):
-            self.print_row_cells(y)
+    def write(self, text: str) -> None:
+        """Write rendered output to the terminal in one call.
 
-            if y < self.maze.height - 1:
-                self.print_row_divider(y)
+        Args:
+            text: The output, as returned by a render method.
+        """
+        if instrument.ENABLED:
+            instrument.count("display.chars_written", len(text))
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+    def render_update(self, full: bool = False) -> str:
+        """Render the terminal output bringing the screen up to date.
+
+        The frame last drawn by redraw is remembered cell by cell. When
+        only overlays changed (path, pattern, their colors), the output
+        moves the cursor to each run of changed cells and rewrites just
+        those. Otherwise the screen is cleared and the whole frame drawn.
+        Either way the cursor ends on the line below the maze, with the
+        rest of the screen cleared.
+
+        Args:
+            full: If True, always clear the screen and draw everything.
+
+        Returns:
+            The text to write to the terminal.
+        """
+        rebuilt = self.refresh_cache()
+        height = self.maze.height
+        if full or rebuilt or self.screen is None:
+            frame = self.render_frame()
+            self.screen = list(self.row_parts)
+            return self.CLEAR + frame
+
+        out = []
+        for y in range(height):
+            if self.row_lines[y] is not None:
+                continue
+            self.row_line(y)
+            old = self.screen[y]
+            new = self.row_parts[y]
+            x = 0
+            while x < len(new):
+                if new[x] == old[x]:
+                    x += 1
+                    continue
+                start = x
+                while x < len(new) and new[x] != old[x]:
+                    x += 1
+                # Cell x starts at column 4 * x + 1 of line 2 * y + 2
+                out.append(f"\033[{2 * y + 2};{4 * start + 1}H")
+                out.extend(new[start:x])
+            self.screen[y] = new
+        out.append(f"\033[{2 * height + 2};1H\033[J")
+        return "".join(out)
+
+    @instrument.timed("display")
+    def redraw(self, full: bool = False, footer: int = 0) -> None:
+        """Update the terminal with as little output as possible.
+
+        In viewport mode only the visible window is drawn, sized to the
+        terminal. Otherwise changed cells are redrawn in place, falling
+        back to a full redraw when stdout is not a terminal, since cursor
+        movements are meaningless in a file or a pipe, and when the maze
+        and footer do not fit on screen, since the terminal then scrolls
+        and line numbers no longer match.
 
-        self.print_bottom_border()
+        Args:
+            full: If True, clear the screen and draw the whole frame, e.g.
+                after other output may have scrolled the terminal.
+            footer: The number of lines the caller prints below the maze.
+        """
+        if self.viewport:
+            self.fit_view(footer)
+            self.screen = None
+            self.write(self.CLEAR + self.render_view())
+            return
+        full = (full or not sys.stdout.isatty()
+                or not self.fits_terminal(footer))
+        self.write(self.render_update(full))
 
     def print_top_border(self) -> None:
         """Print the top border of the maze."""
-        line = f"{self.wall_color}┌"
-        for x in range(self.maze.width):
-            cell = self.maze.get_cell(x, 0)
-            if cell:
-                if cell.north:
-                    line += "───"
-                else:
-                    line += "   "
-
-                if x < self.maze.width - 1:
-                    if cell.east:
-                        line += "┬"
-                    else:
-                        line += "─"
-
-        line += f"┐{self.RESET}"
-        print(line)
+        self.refresh_cache()
+        print(self.border_line(True))
 
     def print_row_cells(self, y: int) -> None:
         """Print a row of maze cells with appropriate coloring.
@@ -126,35 +578,8 @@ class MazeDisplay:
         Args:
             y: The row index to print.
         """
-        line = ""
-
-        for x in range(self.maze.width):
-            cell = self.maze.get_cell(x, y)
-            if cell:
-                if cell.west:
-                    line += f"{self.wall_color}│{self.RESET}"
-                else:
-                    line += " "
-
-                if (x, y) == self.maze.entry:
-                    line += f"{self.entry_color} S {self.RESET}"
-                elif (x, y) == self.maze.exit:
-                    line += f"{self.exit_color} E {self.RESET}"
-                elif self.show_pattern and (x, y) in self.pattern_42_cells:
-                    line += f"{self.pattern_color}   {self.RESET}"
-                elif self.show_path and (x, y) in self.path_cells:
-                    line += f"{self.path_color} · {self.RESET}"
-                else:
-                    line += "   "
-
-        last_cell = self.maze.get_cell(self.maze.width - 1, y)
-        if last_cell:
-            if last_cell.east:
-                line += f"{self.wall_color}│{self.RESET}"
-            else:
-                line += " "
-
-            print(line)
+        self.refresh_cache()
+        print(self.row_line(y))
 
     def print_row_divider(self, y: int) -> None:
         """Print a horizontal divider between maze rows.
@@ -162,37 +587,13 @@ class MazeDisplay:
         Args:
             y: The row index (used to determine wall positions).
         """
-        line = f"{self.wall_color}├"
-        for x in range(self.maze.width):
-            cell = self.maze.get_cell(x, y)
-            if cell:
-                if cell.south:
-                    line += "───"
-                else:
-                    line += "   "
-                if x < self.maze.width - 1:
-                    line += "┼"
-        line += f"┤{self.RESET}"
-        print(line)
+        self.refresh_cache()
+        print(self.divider_line(y))
 
     def print_bottom_border(self) -> None:
         """Print the bottom border of the maze."""
-        y = self.maze.height - 1
-        line = f"{self.wall_color}└"
-
-        for x in range(self.maze.width):
-            cell = self.maze.get_cell(x, y)
-            if cell:
-                if cell.south:
-                    line += "───"
-                else:
-                    line += "   "
-
-                if x < self.maze.width - 1:
-                    line += "┴"
-
-        line += f"┘{self.RESET}"
-        print(line)
+        self.refresh_cache()
+        print(self.border_line(False))
 
     def show_color_options(self) -> dict:
         """Display available wall colors and return the color options.
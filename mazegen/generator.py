@@ -1,53 +1,146 @@
-"""Module for generating mazes using recursive backtracking algorithm."""
+"""Module for generating mazes with pluggable carving algorithms."""
 
 import random
+import time
+from array import array
+from itertools import compress
+from mazegen import instrument
+from mazegen.cell import NORTH, EAST, SOUTH, WEST, ALL_WALLS
+from mazegen.disjoint_set import DisjointSet
 from mazegen.maze import Maze
-from typing import List, Tuple, Optional
+from typing import Any, Callable, Dict, List, Tuple, Optional
 import sys
 
+# Wall bit of each direction code (0=N, 1=E, 2=S, 3=W) and its opposite
+DIRECTION_BITS = (NORTH, EAST, SOUTH, WEST)
+OPPOSITE_BITS = (SOUTH, WEST, NORTH, EAST)
+
+# Map a wall mask to 1 when its east (south) wall is closed, else 0
+EAST_FLAGS = bytes(1 if mask & EAST else 0 for mask in range(256))
+SOUTH_FLAGS = bytes(1 if mask & SOUTH else 0 for mask in range(256))
+
+PATTERN_42 = [
+    [1, 0, 0, 1, 0, 1, 1, 1],
+    [1, 0, 0, 1, 0, 0, 0, 1],
+    [1, 1, 1, 1, 0, 1, 1, 1],
+    [0, 0, 0, 1, 0, 1, 0, 0],
+    [0, 0, 0, 1, 0, 1, 1, 1],
+]
+
+
+def pattern_positions(width: int, height: int) -> List[Tuple[int, int]]:
+    """Compute the cells covered by the '42' pattern centered in a maze.
+
+    Args:
+        width: The width of the maze in cells.
+        height: The height of the maze in cells.
+
+    Returns:
+        The (x, y) coordinates of the pattern cells, row by row, or an
+        empty list if the maze is too small to hold the pattern.
+    """
+    pattern_height = len(PATTERN_42)
+    pattern_width = len(PATTERN_42[0])
+
+    # Calculate center position
+    start_x = (width - pattern_width) // 2
+    start_y = (height - pattern_height) // 2
+
+    # Ensure maze is big enough
+    if start_x < 0 or start_y < 0:
+        return []
+
+    return [
+        (start_x + px, start_y + py)
+        for py in range(pattern_height)
+        for px in range(pattern_width)
+        if PATTERN_42[py][px] == 1
+    ]
+
 
 class MazeGenerator:
-    """Generates mazes using the recursive backtracking algorithm.
+    """Generates mazes with a selectable carving algorithm.
 
     Supports generation of perfect mazes (trees) and
     imperfect mazes (with loops),
     and can add decorative '42' patterns throughout the maze.
+    Carving engines are looked up by name in the ALGORITHMS registry.
     """
 
-    def __init__(self, maze: Maze, seed: Optional[int] = None):
+    def __init__(self, maze: Maze, seed: Optional[int] = None,
+                 algorithm: str = "backtracker"):
         """Initialize the maze generator.
 
         Args:
             maze: The Maze object to generate.
             seed: Optional random seed for reproducible generation.
+            algorithm: Name of the carving engine in ALGORITHMS
+                (default: "backtracker").
+
+        Raises:
+            ValueError: If the algorithm is not registered.
         """
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown maze algorithm: {algorithm}")
         self.maze = maze
         self.seed = seed
-        self.visited = [[False for _ in range(maze.width)]
-                        for _ in range(maze.height)]
+        self.algorithm = algorithm
+        self.cells_per_second = 0.0
+        self.visited = bytearray(maze.width * maze.height)
         self.pattern_42_cells: List[Tuple[int, int]] = []
+        # Each generator owns its RNG so concurrent generators never
+        # interfere with each other's sequences
+        self.rng = random.Random(seed)
+        self.initial_state = self.rng.getstate()
+        self.pending_state: Optional[Tuple[Any, ...]] = None
+
+    def get_state(self) -> Tuple[Any, ...]:
+        """Snapshot the current state of the generator's RNG.
+
+        Returns:
+            An opaque state object accepted by set_state.
+        """
+        return self.rng.getstate()
 
-    def generate(self, perfect: bool = True) -> None:
+    def set_state(self, state: Tuple[Any, ...]) -> None:
+        """Restore an RNG snapshot for the next call to generate.
+
+        The next generation starts from this state instead of reseeding,
+        so passing the initial_state of an earlier run (even an unseeded
+        one) rebuilds exactly the same maze.
+
+        Args:
+            state: A state returned by get_state or taken from
+                initial_state.
+        """
+        self.rng.setstate(state)
+        self.pending_state = state
+
+    @instrument.timed("generate")
+    def generate(
+        self, perfect: bool = True, loop_percentage: float = 0.15
+    ) -> None:
         """Generate the maze.
 
         Args:
             perfect: If True, generates a perfect maze (tree structure).
                     If False, adds loops to create a more complex maze.
+            loop_percentage: For imperfect mazes, the number of walls to
+                remove as a fraction of total cells (default: 0.15).
         """
         self.maze.reset()
         self.pattern_42_cells = []
 
         # Re-apply seed on every generation so seeded runs are always identical
-        if self.seed is not None:
-            random.seed(self.seed)
+        if self.pending_state is not None:
+            self.rng.setstate(self.pending_state)
+            self.pending_state = None
         else:
-            random.seed()
+            self.rng.seed(self.seed)
+        self.initial_state = self.rng.getstate()
 
         # Reset visited grid
-        self.visited = [
-            [False for _ in range(self.maze.width)]
-            for _ in range(self.maze.height)
-        ]
+        self.visited = bytearray(self.maze.width * self.maze.height)
 
         # Place pattern FIRST so maze generates around it
         self.place_pattern_center()
@@ -60,70 +153,228 @@ class MazeGenerator:
         if end_x >= self.maze.width or end_y >= self.maze.height:
             print("Invalid Exit dimensions")
             sys.exit(1)
-        self.recursive_backtrack(start_x, start_y)
+
+        started = time.perf_counter()
+        self.carve(start_x, start_y)
+        elapsed = time.perf_counter() - started
+        cells = self.maze.width * self.maze.height
+        self.cells_per_second = cells / elapsed if elapsed > 0 else 0.0
+        if instrument.ENABLED:
+            carved = cells - self.maze.walls.count(ALL_WALLS)
+            instrument.count("generate.cells_visited", carved)
 
         if not perfect:
-            self.add_loops()
+            self.add_loops(loop_percentage)
+        self.maze.generation += 1
+
+    def carve(self, x: int, y: int) -> None:
+        """Carve the passages with the selected engine.
+
+        Args:
+            x: The x-coordinate of the starting cell.
+            y: The y-coordinate of the starting cell.
+        """
+        ALGORITHMS[self.algorithm](self, x, y)
 
     def place_pattern_center(self) -> None:
         """Place '42' pattern as obstacles in the center of the maze."""
-        pattern = [
-            [1, 0, 0, 1, 0, 1, 1, 1],
-            [1, 0, 0, 1, 0, 0, 0, 1],
-            [1, 1, 1, 1, 0, 1, 1, 1],
-            [0, 0, 0, 1, 0, 1, 0, 0],
-            [0, 0, 0, 1, 0, 1, 1, 1],
-        ]
-
-        pattern_height = len(pattern)
-        pattern_width = len(pattern[0])
-
-        # Calculate center position
-        start_x = (self.maze.width - pattern_width) // 2
-        start_y = (self.maze.height - pattern_height) // 2
-
-        # Ensure maze is big enough
-        if start_x < 0 or start_y < 0:
-            return
+        for cell_x, cell_y in pattern_positions(self.maze.width,
+                                                self.maze.height):
+            # Compare coordinates: cells are views on the packed grid
+            if (cell_x, cell_y) == self.maze.exit:
+                sys.exit("exit provided conflict with 42 pattern")
+            if (cell_x, cell_y) == self.maze.entry:
+                sys.exit("entry provided conflict with 42 pattern")
 
-        # Place the pattern
-        for py in range(pattern_height):
-            for px in range(pattern_width):
-                if pattern[py][px] == 1:
-                    cell_x = start_x + px
-                    cell_y = start_y + py
-                ex, ey = self.maze.exit
-                ix, iy = self.maze.entry
-                ex_cell = self.maze.get_cell(ex, ey)
-                patt_cell = self.maze.get_cell(cell_x, cell_y)
-                ix_cell = self.maze.get_cell(ix, iy)
-                if ex_cell == patt_cell:
-                    sys.exit("exit provided conflict with 42 pattern")
-                if ix_cell == patt_cell:
-                    sys.exit("entry provided conflict with 42 pattern")
-
-                if self.maze.is_valid_position(cell_x, cell_y):
-                    # Mark as visited so generator avoids it
-                    self.visited[cell_y][cell_x] = True
-
-                    # Add to pattern list for display
-                    self.pattern_42_cells.append((cell_x, cell_y))
-
-    def recursive_backtrack(self, x: int, y: int) -> None:
-        """Generate maze using recursive backtracking from a starting cell.
+            # Mark as visited so generator avoids it
+            self.visited[self.maze.index(cell_x, cell_y)] = 1
+
+            # Add to pattern list for display
+            self.pattern_42_cells.append((cell_x, cell_y))
+
+    def backtrack(self, x: int, y: int) -> None:
+        """Carve the maze with an explicit-stack depth-first backtracker.
+
+        Produces the same maze for a given seed as a recursive
+        backtracker, but keeps the Python stack depth constant. Each stack
+        level stores its cell index and the directions still to try,
+        packed three bits per direction, so very deep corridors stay cheap.
 
         Args:
-            x: The x-coordinate of the current cell.
-            y: The y-coordinate of the current cell.
+            x: The x-coordinate of the starting cell.
+            y: The y-coordinate of the starting cell.
+        """
+        start = self.maze.index(x, y)
+        self.visited[start] = 1
+        cells = array("q", [start])
+        orders = array("q", [self.shuffled_directions(start)])
+        walls = self.maze.walls
+        visited = self.visited
+        width = self.maze.width
+        steps = (-width, 1, width, -1)
+
+        while cells:
+            order = orders[-1]
+            if not order:
+                cells.pop()
+                orders.pop()
+                continue
+            orders[-1] = order >> 3
+            direction = (order & 7) - 1
+            current = cells[-1]
+            nxt = current + steps[direction]
+            if visited[nxt]:
+                continue
+            walls[current] &= ~DIRECTION_BITS[direction]
+            walls[nxt] &= ~OPPOSITE_BITS[direction]
+            visited[nxt] = 1
+            cells.append(nxt)
+            orders.append(self.shuffled_directions(nxt))
+
+    def shuffled_directions(self, index: int) -> int:
+        """Shuffle the unvisited directions around a cell.
+
+        Directions are gathered in N, E, S, W order and shuffled exactly
+        like the neighbour list of the recursive backtracker, so the random
+        sequence is consumed identically.
+
+        Args:
+            index: The flat index of the cell.
+
+        Returns:
+            The shuffled direction codes packed three bits each (code + 1),
+            first direction in the lowest bits; 0 when there are none.
+        """
+        width = self.maze.width
+        visited = self.visited
+        x = index % width
+        directions = []
+        if index >= width and not visited[index - width]:
+            directions.append(0)
+        if x < width - 1 and not visited[index + 1]:
+            directions.append(1)
+        if index + width < len(visited) and not visited[index + width]:
+            directions.append(2)
+        if x > 0 and not visited[index - 1]:
+            directions.append(3)
+        if len(directions) > 1:
+            self.rng.shuffle(directions)
+        order = 0
+        for position, direction in enumerate(directions):
+            order |= (direction + 1) << (3 * position)
+        return order
+
+    def kruskal(self, x: int, y: int) -> None:
+        """Carve the maze with randomized Kruskal's algorithm.
+
+        Every interior wall between two non-pattern cells is listed once,
+        shuffled, and opened when it joins two different trees of a
+        disjoint set. The start cell is unused: Kruskal grows all trees at
+        once.
+
+        Args:
+            x: The x-coordinate of the starting cell.
+            y: The y-coordinate of the starting cell.
         """
-        self.visited[y][x] = True
-        neighbors = self.get_unvisited_neighbors(x, y)
-        random.shuffle(neighbors)
+        width = self.maze.width
+        walls = self.maze.walls
+        blocked = self.visited
+        size = len(walls)
+
+        # Each wall is encoded as cell index * 2, plus 1 for a south wall
+        edges = array("q")
+        for index in range(size):
+            if blocked[index]:
+                continue
+            if index % width < width - 1 and not blocked[index + 1]:
+                edges.append(index * 2)
+            if index + width < size and not blocked[index + width]:
+                edges.append(index * 2 + 1)
+        self.rng.shuffle(edges)
+
+        sets = DisjointSet(size)
+        for edge in edges:
+            index = edge >> 1
+            if edge & 1:
+                nxt = index + width
+                if sets.union(index, nxt):
+                    walls[index] &= ~SOUTH
+                    walls[nxt] &= ~NORTH
+            else:
+                nxt = index + 1
+                if sets.union(index, nxt):
+                    walls[index] &= ~EAST
+                    walls[nxt] &= ~WEST
+
+        blocked[:] = bytes([1]) * size
+
+    def prim(self, x: int, y: int) -> None:
+        """Carve the maze with randomized Prim's algorithm.
+
+        Grows a single tree from the start cell. Cells next to the tree
+        form the frontier; a random frontier cell is removed (swap with the
+        last entry, then pop) and joined to a random neighbour already in
+        the tree.
 
-        for next_x, next_y, direction in neighbors:
-            if not self.visited[next_y][next_x]:
-                self.remove_wall_between(x, y, next_x, next_y, direction)
-                self.recursive_backtrack(next_x, next_y)
+        Args:
+            x: The x-coordinate of the starting cell.
+            y: The y-coordinate of the starting cell.
+        """
+        width = self.maze.width
+        walls = self.maze.walls
+        visited = self.visited
+        blocked = bytes(visited)
+        size = len(walls)
+        steps = (-width, 1, width, -1)
+        in_frontier = bytearray(size)
+        frontier: List[int] = []
+
+        def grow(index: int) -> None:
+            visited[index] = 1
+            for _, nxt in self.neighbor_indices(index):
+                if not visited[nxt] and not in_frontier[nxt]:
+                    in_frontier[nxt] = 1
+                    frontier.append(nxt)
+
+        grow(self.maze.index(x, y))
+        while frontier:
+            pick = self.rng.randrange(len(frontier))
+            index = frontier[pick]
+            frontier[pick] = frontier[-1]
+            frontier.pop()
+
+            links = [
+                direction
+                for direction, nxt in self.neighbor_indices(index)
+                if visited[nxt] and not blocked[nxt]
+            ]
+            direction = self.rng.choice(links)
+            walls[index] &= ~DIRECTION_BITS[direction]
+            walls[index + steps[direction]] &= ~OPPOSITE_BITS[direction]
+            grow(index)
+
+    def neighbor_indices(self, index: int) -> List[Tuple[int, int]]:
+        """List the in-bounds neighbours of a cell.
+
+        Args:
+            index: The flat index of the cell.
+
+        Returns:
+            A list of (direction code, neighbor index) pairs in N, E, S, W
+            order, direction codes being 0-3.
+        """
+        width = self.maze.width
+        x = index % width
+        neighbors = []
+        if index >= width:
+            neighbors.append((0, index - width))
+        if x < width - 1:
+            neighbors.append((1, index + 1))
+        if index + width < len(self.visited):
+            neighbors.append((2, index + width))
+        if x > 0:
+            neighbors.append((3, index - 1))
+        return neighbors
 
     def get_unvisited_neighbors(self, x: int,
                                 y: int) -> List[Tuple[int, int, str]]:
@@ -137,17 +388,20 @@ class MazeGenerator:
             List of tuples (x, y, direction) for each unvisited neighbor.
         """
         neighbors = []
+        visited = self.visited
+        index = self.maze.index(x, y)
+        width = self.maze.width
 
-        if y > 0 and not self.visited[y - 1][x]:
+        if y > 0 and not visited[index - width]:
             neighbors.append((x, y - 1, "north"))
 
-        if x < self.maze.width - 1 and not self.visited[y][x + 1]:
+        if x < width - 1 and not visited[index + 1]:
             neighbors.append((x + 1, y, "east"))
 
-        if y < self.maze.height - 1 and not self.visited[y + 1][x]:
+        if y < self.maze.height - 1 and not visited[index + width]:
             neighbors.append((x, y + 1, "south"))
 
-        if x > 0 and not self.visited[y][x - 1]:
+        if x > 0 and not visited[index - 1]:
             neighbors.append((x - 1, y, "west"))
 
         return neighbors
@@ -181,67 +435,79 @@ class MazeGenerator:
                 cell1.west = False
                 cell2.east = False
 
+    @instrument.timed("add_loops")
     def add_loops(self, loop_percentage: float = 0.15) -> None:
         """Add loops to the maze by randomly removing walls.
 
         Creates cycles in the maze structure, making it more complex and
-        less tree-like.
+        less tree-like. The walls are drawn without replacement from the
+        closed interior walls that do not touch the '42' pattern, so
+        exactly the requested number is removed whenever that many
+        candidates exist.
 
         Args:
             loop_percentage: The percentage of walls to remove as a fraction
                            of total cells (default: 0.15 or 15%).
         """
-        total_cells = self.maze.width * self.maze.height
+        width = self.maze.width
+        height = self.maze.height
+        walls = self.maze.walls
+        total_cells = width * height
         walls_to_remove = int(total_cells * loop_percentage)
-        pattern_set = set(self.pattern_42_cells)
-
-        removed = 0
-        attempts = 0
-        max_attempts = walls_to_remove * 10
-
-        while removed < walls_to_remove and attempts < max_attempts:
-            attempts += 1
-            x = random.randint(0, self.maze.width - 1)
-            y = random.randint(0, self.maze.height - 1)
-
-            if (x, y) in pattern_set:
-                continue
-
-            cell = self.maze.get_cell(x, y)
-            if not cell:
-                continue
+        if walls_to_remove <= 0:
+            return
 
-            direction = random.choice(["north", "east", "south", "west"])
-            height = self.maze.height
-            if direction == "north" and y > 0 and cell.north:
-                if (x, y - 1) in pattern_set:
-                    continue
-                neighbor = self.maze.get_cell(x, y - 1)
-                if neighbor:
-                    cell.north = False
-                    neighbor.south = False
-                    removed += 1
-            elif direction == "east" and x < self.maze.width - 1 and cell.east:
-                if (x + 1, y) in pattern_set:
-                    continue
-                neighbor = self.maze.get_cell(x + 1, y)
-                if neighbor:
-                    cell.east = False
-                    neighbor.west = False
-                    removed += 1
-            elif direction == "south" and y < height - 1 and cell.south:
-                if (x, y + 1) in pattern_set:
-                    continue
-                neighbor = self.maze.get_cell(x, y + 1)
-                if neighbor:
-                    cell.south = False
-                    neighbor.north = False
-                    removed += 1
-            elif direction == "west" and x > 0 and cell.west:
-                if (x - 1, y) in pattern_set:
-                    continue
-                neighbor = self.maze.get_cell(x - 1, y)
-                if neighbor:
-                    cell.west = False
-                    neighbor.east = False
-                    removed += 1
+        # One flag per cell telling whether its east (south) wall may go;
+        # the last column (row) only has border walls
+        east = walls.translate(EAST_FLAGS)
+        east[width - 1::width] = bytes(height)
+        south = walls.translate(SOUTH_FLAGS)
+        south[total_cells - width:] = bytes(width)
+        for x, y in self.pattern_42_cells:
+            index = y * width + x
+            east[index] = south[index] = 0
+            if x > 0:
+                east[index - 1] = 0
+            if y > 0:
+                south[index - width] = 0
+
+        # Candidate k stands for the east wall of cell k // 2 when k is
+        # even and for its south wall when k is odd
+        candidates = list(compress(range(0, 2 * total_cells, 2), east))
+        candidates += compress(range(1, 2 * total_cells, 2), south)
+        count = min(walls_to_remove, len(candidates))
+
+        if instrument.ENABLED:
+            instrument.count("add_loops.walls_removed", count)
+        for candidate in self.rng.sample(candidates, count):
+            index = candidate >> 1
+            if candidate & 1:
+                walls[index] &= ~SOUTH
+                walls[index + width] &= ~NORTH
+            else:
+                walls[index] &= ~EAST
+                walls[index + 1] &= ~WEST
+
+
+ALGORITHMS: Dict[str, Callable[[MazeGenerator, int, int], None]] = {
+    "backtracker": MazeGenerator.backtrack,
+    "kruskal": MazeGenerator.kruskal,
+    "prim": MazeGenerator.prim,
+}
+
+
+def register_algorithm(
+    name: str, engine: Callable[[MazeGenerator, int, int], None]
+) -> None:
+    """Register a carving engine under a name usable as ALGORITHM.
+
+    An engine receives the generator and the entry coordinates. It must
+    carve through maze.walls without entering cells already marked in
+    generator.visited, which holds the '42' pattern cells on entry, and
+    draw all randomness from generator.rng.
+
+    Args:
+        name: The name of the engine, as written in the config file.
+        engine: The carving function.
+    """
+    ALGORITHMS[name] = engine
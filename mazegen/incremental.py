@@ -0,0 +1,241 @@
+"""Module for keeping a maze solution up to date while walls are edited."""
+
+import heapq
+from array import array
+from collections import deque
+from mazegen import instrument
+from mazegen.maze import Maze
+from mazegen.pathfinder import DIRECTION_NAMES, OPPOSITE_CODES, PathFinder
+from typing import Deque, List, Optional, Set, Tuple
+
+UNREACHED = -1
+
+
+class IncrementalSolver:
+    """Maintains the distance from the entry to every cell under edits.
+
+    The breadth-first distance field is computed once. Each wall edit
+    made through open_wall or close_wall then only repairs the cells whose
+    distance actually changes. Opening a wall propagates shorter distances
+    outwards from the wall. Closing one first collects the cells that lost
+    every shortest route, then settles just those again from their
+    unaffected neighbours. The path to the exit is read off the field by
+    walking down the distances, in time proportional to its length.
+
+    Walls edited on the maze directly, bypassing the solver, leave the
+    field stale until rebuild is called.
+    """
+
+    def __init__(self, maze: Maze, start: Optional[Tuple[int, int]] = None,
+                 end: Optional[Tuple[int, int]] = None):
+        """Initialize the solver and compute the distance field.
+
+        Args:
+            maze: The maze to solve.
+            start: The (x, y) coordinates distances are measured from
+                (default: the maze entry).
+            end: The (x, y) coordinates find_path leads to (default: the
+                maze exit).
+        """
+        self.maze = maze
+        self.finder = PathFinder(maze)
+        self.start = start if start is not None else maze.entry
+        self.end = end if end is not None else maze.exit
+        self.cells_repaired = 0
+        self.distance = array("l")
+        self.rebuild()
+
+    def rebuild(self) -> None:
+        """Recompute the whole distance field with a breadth-first search."""
+        maze = self.maze
+        distance = array("l", [UNREACHED]) * (maze.width * maze.height)
+        source = maze.index(*self.start)
+        distance[source] = 0
+        queue: Deque[int] = deque([source])
+        while queue:
+            current = queue.popleft()
+            step = distance[current] + 1
+            for _, neighbor in self.finder.open_neighbors(current):
+                if distance[neighbor] == UNREACHED:
+                    distance[neighbor] = step
+                    queue.append(neighbor)
+        self.distance = distance
+        self.cells_repaired = len(distance)
+
+    def distance_to(self, x: int, y: int) -> Optional[int]:
+        """Return the number of moves from the start to a cell.
+
+        Args:
+            x: The x-coordinate of the cell.
+            y: The y-coordinate of the cell.
+
+        Returns:
+            The distance, or None if the cell cannot be reached.
+        """
+        value = self.distance[self.maze.index(x, y)]
+        return None if value == UNREACHED else value
+
+    def open_wall(self, x1: int, y1: int, x2: int, y2: int) -> bool:
+        """Open the wall between two adjacent cells and repair distances.
+
+        Args:
+            x1: The x-coordinate of the first cell.
+            y1: The y-coordinate of the first cell.
+            x2: The x-coordinate of the second cell.
+            y2: The y-coordinate of the second cell.
+
+        Returns:
+            True if the wall was closed before the call.
+
+        Raises:
+            ValueError: If the cells are not adjacent cells of the maze.
+        """
+        self.cells_repaired = 0
+        if not self.maze.open_wall(x1, y1, x2, y2):
+            return False
+        first = self.maze.index(x1, y1)
+        second = self.maze.index(x2, y2)
+        self.lower(first, second)
+        self.lower(second, first)
+        instrument.count("incremental.cells_repaired", self.cells_repaired)
+        return True
+
+    def close_wall(self, x1: int, y1: int, x2: int, y2: int) -> bool:
+        """Close the wall between two adjacent cells and repair distances.
+
+        Args:
+            x1: The x-coordinate of the first cell.
+            y1: The y-coordinate of the first cell.
+            x2: The x-coordinate of the second cell.
+            y2: The y-coordinate of the second cell.
+
+        Returns:
+            True if the wall was open before the call.
+
+        Raises:
+            ValueError: If the cells are not adjacent cells of the maze.
+        """
+        self.cells_repaired = 0
+        if not self.maze.close_wall(x1, y1, x2, y2):
+            return False
+        first = self.maze.index(x1, y1)
+        second = self.maze.index(x2, y2)
+        distance = self.distance
+        # Only the farther cell can have relied on the closed wall
+        if distance[first] == distance[second] + 1:
+            self.raise_distances(first)
+        elif distance[second] == distance[first] + 1:
+            self.raise_distances(second)
+        instrument.count("incremental.cells_repaired", self.cells_repaired)
+        return True
+
+    def lower(self, source: int, target: int) -> None:
+        """Propagate the shorter distances a newly opened wall allows.
+
+        Args:
+            source: The cell on the side that may offer a shortcut.
+            target: The cell on the other side of the opened wall.
+        """
+        distance = self.distance
+        if distance[source] == UNREACHED:
+            return
+        step = distance[source] + 1
+        if distance[target] != UNREACHED and distance[target] <= step:
+            return
+        distance[target] = step
+        self.cells_repaired += 1
+        queue: Deque[int] = deque([target])
+        while queue:
+            current = queue.popleft()
+            step = distance[current] + 1
+            for _, neighbor in self.finder.open_neighbors(current):
+                value = distance[neighbor]
+                if value == UNREACHED or value > step:
+                    distance[neighbor] = step
+                    self.cells_repaired += 1
+                    queue.append(neighbor)
+
+    def supported(self, index: int, affected: Set[int]) -> bool:
+        """Check whether a cell keeps a shortest route outside a region.
+
+        Args:
+            index: The flat index of the cell.
+            affected: The cells known to have lost their distance.
+
+        Returns:
+            True if an open neighbor one step closer to the start lies
+            outside the affected region.
+        """
+        previous = self.distance[index] - 1
+        for _, neighbor in self.finder.open_neighbors(index):
+            if (self.distance[neighbor] == previous
+                    and neighbor not in affected):
+                return True
+        return False
+
+    def raise_distances(self, root: int) -> None:
+        """Repair the distances after a wall into a cell was closed.
+
+        Args:
+            root: The cell that may have lost its shortest route.
+        """
+        distance = self.distance
+        if self.supported(root, set()):
+            return
+
+        # Cells are visited by increasing distance, so every affected
+        # cell one step closer is known before a cell is checked
+        affected = {root}
+        order = [root]
+        for current in order:
+            step = distance[current] + 1
+            for _, neighbor in self.finder.open_neighbors(current):
+                if (distance[neighbor] == step and neighbor not in affected
+                        and not self.supported(neighbor, affected)):
+                    affected.add(neighbor)
+                    order.append(neighbor)
+        self.cells_repaired = len(order)
+
+        # Settle the affected cells again from their unaffected neighbours
+        heap: List[Tuple[int, int]] = []
+        for index in order:
+            best = UNREACHED
+            for _, neighbor in self.finder.open_neighbors(index):
+                value = distance[neighbor]
+                if neighbor not in affected and value != UNREACHED:
+                    if best == UNREACHED or value + 1 < best:
+                        best = value + 1
+            if best != UNREACHED:
+                heap.append((best, index))
+        for index in order:
+            distance[index] = UNREACHED
+        heapq.heapify(heap)
+        while heap:
+            value, index = heapq.heappop(heap)
+            if distance[index] != UNREACHED:
+                continue
+            distance[index] = value
+            for _, neighbor in self.finder.open_neighbors(index):
+                if neighbor in affected and distance[neighbor] == UNREACHED:
+                    heapq.heappush(heap, (value + 1, neighbor))
+
+    def find_path(self) -> Optional[List[str]]:
+        """Read the shortest path from the start to the end off the field.
+
+        Returns:
+            List of direction characters ('N', 'E', 'S', 'W'), or None if
+            the end cannot be reached.
+        """
+        current = self.maze.index(*self.end)
+        if self.distance[current] == UNREACHED:
+            return None
+        moves = []
+        while self.distance[current] > 0:
+            previous = self.distance[current] - 1
+            for code, neighbor in self.finder.open_neighbors(current):
+                if self.distance[neighbor] == previous:
+                    moves.append(DIRECTION_NAMES[OPPOSITE_CODES[code]])
+                    current = neighbor
+                    break
+        moves.reverse()
+        return moves
@@ -1,14 +1,34 @@
 """Module for representing and manipulating a maze grid."""
 
-from mazegen.cell import Cell
-from typing import Optional, List
+from mazegen import instrument
+from mazegen.cell import Cell, CellView, NORTH, EAST, SOUTH, WEST, ALL_WALLS
+from typing import Optional, List, Sequence, TextIO, Tuple
+
+HEX_DIGITS = bytes.maketrans(bytes(range(16)), b"0123456789ABCDEF")
+HEX_VALUES = bytes.maketrans(b"0123456789ABCDEFabcdef",
+                             bytes(range(16)) + bytes(range(10, 16)))
+
+# Wall bits of the first and second cell, keyed by the step between them
+SHARED_WALLS = {
+    (0, -1): (NORTH, SOUTH),
+    (1, 0): (EAST, WEST),
+    (0, 1): (SOUTH, NORTH),
+    (-1, 0): (WEST, EAST),
+}
 
 
 class Maze:
     """Represents a rectangular maze grid composed of cells with walls.
 
     Manages the maze structure including dimensions, entry/exit points,
-    and individual cell states.
+    and individual cell states. Walls are stored packed in a bytearray,
+    one 4-bit N/E/S/W mask per cell in row-major order. The generation
+    counter goes up whenever the walls are reset, regenerated or edited
+    through open_wall and close_wall, so indexes built on the maze can
+    tell they are stale.
+
+    An optional cost layer gives each cell the cost of moving into it,
+    one byte (1-255) per cell; without it every move costs the same.
     """
 
     def __init__(
@@ -27,12 +47,33 @@ class Maze:
         self.height = height
         self.entry = entry
         self.exit = exit
-        self.grid = [[Cell() for _ in range(width)] for _ in range(height)]
+        self.walls = bytearray([ALL_WALLS]) * (width * height)
+        self.costs: Optional[bytearray] = None
+        self.generation = 0
 
     def reset(self) -> None:
         """Reset all cells in the maze to have all walls intact."""
-        self.grid = [[Cell() for _ in range(self.width)]
-                     for _ in range(self.height)]
+        self.walls[:] = bytes([ALL_WALLS]) * len(self.walls)
+        self.generation += 1
+
+    def set_costs(self, costs: Optional[Sequence[int]]) -> None:
+        """Set the cost of moving into each cell, or remove the layer.
+
+        Args:
+            costs: One cost (1-255) per cell in row-major order, or None
+                to make every move cost the same again.
+
+        Raises:
+            ValueError: If there is not one cost per cell or a cost is 0.
+        """
+        if costs is not None:
+            if len(costs) != self.width * self.height:
+                raise ValueError(f"Expected {self.width * self.height} "
+                                 f"cell costs, got {len(costs)}")
+            if 0 in costs:
+                raise ValueError("Cell costs must be between 1 and 255")
+        self.costs = None if costs is None else bytearray(costs)
+        self.generation += 1
 
     def is_valid_position(self, x: int, y: int) -> bool:
         """Check if the given coordinates are within the maze bounds.
@@ -46,6 +87,124 @@ class Maze:
         """
         return 0 <= x < self.width and 0 <= y < self.height
 
+    def index(self, x: int, y: int) -> int:
+        """Return the flat buffer index of a cell.
+
+        Args:
+            x: The x-coordinate of the cell.
+            y: The y-coordinate of the cell.
+
+        Returns:
+            The index of the cell inside the wall buffer.
+        """
+        return y * self.width + x
+
+    def get_walls(self, x: int, y: int) -> int:
+        """Return the raw 4-bit wall mask of a cell.
+
+        Args:
+            x: The x-coordinate of the cell.
+            y: The y-coordinate of the cell.
+
+        Returns:
+            The wall mask (N=1, E=2, S=4, W=8) of the cell.
+        """
+        return self.walls[y * self.width + x]
+
+    def shared_wall(
+        self, x1: int, y1: int, x2: int, y2: int
+    ) -> Tuple[int, int]:
+        """Find the wall bits two adjacent cells use for their shared wall.
+
+        Args:
+            x1: The x-coordinate of the first cell.
+            y1: The y-coordinate of the first cell.
+            x2: The x-coordinate of the second cell.
+            y2: The y-coordinate of the second cell.
+
+        Returns:
+            A tuple (first bit, second bit).
+
+        Raises:
+            ValueError: If a cell is outside the maze or the cells are not
+                adjacent.
+        """
+        if not (self.is_valid_position(x1, y1)
+                and self.is_valid_position(x2, y2)):
+            raise ValueError(f"({x1},{y1})-({x2},{y2}) leaves the maze")
+        bits = SHARED_WALLS.get((x2 - x1, y2 - y1))
+        if bits is None:
+            raise ValueError(f"({x1},{y1}) and ({x2},{y2}) are not adjacent")
+        return bits
+
+    def has_wall(self, x1: int, y1: int, x2: int, y2: int) -> bool:
+        """Check whether a wall separates two adjacent cells.
+
+        Args:
+            x1: The x-coordinate of the first cell.
+            y1: The y-coordinate of the first cell.
+            x2: The x-coordinate of the second cell.
+            y2: The y-coordinate of the second cell.
+
+        Returns:
+            True if the wall is closed.
+
+        Raises:
+            ValueError: If the cells are not adjacent cells of the maze.
+        """
+        bit, _ = self.shared_wall(x1, y1, x2, y2)
+        return bool(self.walls[y1 * self.width + x1] & bit)
+
+    def open_wall(self, x1: int, y1: int, x2: int, y2: int) -> bool:
+        """Remove the wall between two adjacent cells, on both sides.
+
+        Args:
+            x1: The x-coordinate of the first cell.
+            y1: The y-coordinate of the first cell.
+            x2: The x-coordinate of the second cell.
+            y2: The y-coordinate of the second cell.
+
+        Returns:
+            True if the wall was closed before the call.
+
+        Raises:
+            ValueError: If the cells are not adjacent cells of the maze.
+        """
+        first, second = self.shared_wall(x1, y1, x2, y2)
+        index1 = y1 * self.width + x1
+        index2 = y2 * self.width + x2
+        changed = bool(self.walls[index1] & first)
+        self.walls[index1] &= ~first
+        self.walls[index2] &= ~second
+        if changed:
+            self.generation += 1
+        return changed
+
+    def close_wall(self, x1: int, y1: int, x2: int, y2: int) -> bool:
+        """Add the wall between two adjacent cells, on both sides.
+
+        Args:
+            x1: The x-coordinate of the first cell.
+            y1: The y-coordinate of the first cell.
+            x2: The x-coordinate of the second cell.
+            y2: The y-coordinate of the second cell.
+
+        Returns:
+            True if the wall was open before the call.
+
+        Raises:
+            ValueError: If the cells are not adjacent cells of the maze.
+        """
+        first, second = self.shared_wall(x1, y1, x2, y2)
+        index1 = y1 * self.width + x1
+        index2 = y2 * self.width + x2
+        changed = not self.walls[index1] & first
+        self.walls[index1] |= first
+        self.walls[index2] |= second
+        if changed:
+            self.generation += 1
+        return changed
+
     def get_cell(self, x: int, y: int) -> Optional[Cell]:
         """Retrieve a cell at the specified coordinates.
 
@@ -54,11 +213,11 @@ class Maze:
             y: The y-coordinate of the cell.
 
         Returns:
-            The Cell object at the position, or None if out of bounds.
+            A CellView bound to the position, or None if out of bounds.
         """
         if not self.is_valid_position(x, y):
             return None
-        return self.grid[y][x]
+        return CellView(self.walls, y * self.width + x)
 
     def set_cell(self, x: int, y: int, cell: Cell) -> None:
         """Set a cell at the specified coordinates.
@@ -66,11 +225,25 @@ class Maze:
         Args:
             x: The x-coordinate of the cell.
             y: The y-coordinate of the cell.
-            cell: The Cell object to place at this position.
+            cell: The Cell object whose walls are copied to this position.
         """
         if self.is_valid_position(x, y):
-            self.grid[y][x] = cell
+            self.walls[y * self.width + x] = cell.to_mask()
+
+    def row_hex(self, y: int) -> bytes:
+        """Return one row of the maze encoded as hex digits.
+
+        Args:
+            y: The row index to encode.
+
+        Returns:
+            The row as ASCII hex characters, one per cell.
+        """
+        start = y * self.width
+        row = self.walls[start:start + self.width]
+        return bytes(row.translate(HEX_DIGITS))
 
+    @instrument.timed("to_file")
     def to_file(self, filepath: str | None, path: List[str]) -> None:
         """Write the maze to a file in hex-encoded format.
 
@@ -79,14 +252,98 @@ class Maze:
             path: List of direction characters representing the solution path.
         """
         with open(str(filepath), "w") as f:
+            self.write(f, path)
+            if instrument.ENABLED:
+                instrument.count("to_file.bytes_written", f.tell())
+
+    def write(self, stream: TextIO, path: List[str]) -> None:
+        """Write the maze in hex-encoded format to an open text stream.
+
+        Args:
+            stream: The text stream to write to.
+            path: List of direction characters representing the solution path.
+        """
+        for y in range(self.height):
+            stream.write(self.row_hex(y).decode("ascii"))
+            stream.write("\n")
+
+        stream.write("\n")
+        if self.costs is not None:
+            # Two hex digits per cell, in a section of its own before the
+            # footer, so readers of unweighted files still find it last
             for y in range(self.height):
-                for x in range(self.width):
-                    cell = self.get_cell(x, y)
-                    if cell:
-                        f.write(cell.to_hex())
-                f.write("\n")
-
-            f.write("\n")
-            f.write(f"{self.entry[0]},{self.entry[1]}\n")
-            f.write(f"{self.exit[0]},{self.exit[1]}\n")
-            f.write("".join(path) + "\n")
+                start = y * self.width
+                row = self.costs[start:start + self.width]
+                stream.write(row.hex().upper())
+                stream.write("\n")
+            stream.write("\n")
+        stream.write(f"{self.entry[0]},{self.entry[1]}\n")
+        stream.write(f"{self.exit[0]},{self.exit[1]}\n")
+        stream.write("".join(path) + "\n")
+
+    @classmethod
+    def from_file(cls, filepath: str) -> Tuple["Maze", List[str]]:
+        """Load a maze written by to_file.
+
+        The whole grid is decoded at once: rows are joined and turned into
+        wall masks with a single bytes.translate call instead of parsing
+        each character separately.
+
+        Args:
+            filepath: The hex-encoded maze file to read.
+
+        Returns:
+            A tuple (maze, path) where path is the stored solution as a
+            list of direction characters (empty if none was stored).
+
+        Raises:
+            ValueError: If the file is not a well-formed maze file.
+        """
+        with open(filepath, "rb") as f:
+            data = f.read().replace(b"\r\n", b"\n")
+
+        grid, separator, footer = data.partition(b"\n\n")
+        if not separator:
+            raise ValueError(f"{filepath}: missing blank line after grid")
+        rows = grid.split(b"\n")
+        width = len(rows[0])
+        if not width or any(len(row) != width for row in rows):
+            raise ValueError(f"{filepath}: rows have inconsistent widths")
+        digits = b"".join(rows)
+        if digits.translate(None, b"0123456789ABCDEFabcdef"):
+            raise ValueError(f"{filepath}: invalid hex digit in grid")
+
+        # Coordinate lines have a comma, cost rows never do
+        costs = None
+        if footer and b"," not in footer.split(b"\n", 1)[0]:
+            section, _, footer = footer.partition(b"\n\n")
+            try:
+                costs = bytes.fromhex(section.replace(b"\n", b"")
+                                      .decode("ascii"))
+            except (UnicodeDecodeError, ValueError):
+                raise ValueError(
+                    f"{filepath}: invalid cost section") from None
+
+        lines = footer.split(b"\n")
+        if len(lines) < 2:
+            raise ValueError(f"{filepath}: missing entry or exit line")
+        points = []
+        for line in lines[:2]:
+            parts = line.split(b",")
+            if len(parts) != 2:
+                raise ValueError(f"{filepath}: invalid coordinates {line!r}")
+            points.append((int(parts[0]), int(parts[1])))
+        path: List[str] = []
+        if len(lines) > 2:
+            path = list(lines[2].strip().decode("ascii"))
+        if any(move not in "NESW" for move in path):
+            raise ValueError(f"{filepath}: invalid move in solution path")
+
+        maze = cls(width, len(rows), points[0], points[1])
+        maze.walls[:] = digits.translate(HEX_VALUES)
+        if costs is not None:
+            try:
+                maze.set_costs(costs)
+            except ValueError as e:
+                raise ValueError(f"{filepath}: {e}") from None
+        return maze, path
@@ -0,0 +1,489 @@
+"""Module for answering many path queries on the same maze quickly.
+
+A DistanceField is one full breadth-first search from a source, after
+which the distance and a shortest path to any cell are read off without
+searching. A perfect maze is a tree (a forest once the '42' pattern
+cells are cut out), so a TreeIndex answers queries between any two
+cells: the path between them runs through their lowest common ancestor,
+found in O(log n) with jump pointers. PathIndex picks between the two
+and rebuilds them whenever the maze changes. Its find_paths answers a
+whole batch of queries, with one search per distinct source.
+"""
+
+from array import array
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from mazegen.cell import NORTH, EAST, SOUTH, WEST
+from mazegen.incremental import UNREACHED
+from mazegen.maze import Maze
+from mazegen.pathfinder import (DIRECTION_NAMES, OPPOSITE_CODES, START_MARK,
+                                PathFinder)
+from typing import Deque, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+# A path query: the (x, y) coordinates of its start and end cells
+Query = Tuple[Tuple[int, int], Tuple[int, int]]
+
+
+class SourceJob(NamedTuple):
+    """Searches handed to one worker process."""
+
+    width: int
+    height: int
+    walls: bytes
+    sources: List[Tuple[int, List[int]]]
+
+
+def search_sources(
+    finder: PathFinder, sources: List[Tuple[int, List[int]]]
+) -> List[Dict[int, List[str]]]:
+    """Run one breadth-first search per source, all sharing one buffer.
+
+    Args:
+        finder: The pathfinder of the maze.
+        sources: Each source cell index with the target cell indices
+            queried from it.
+
+    Returns:
+        For each source, in order, the path to each reached target.
+    """
+    came_from = finder.new_marks()
+    return [finder.bfs_targets(source, set(targets), came_from)
+            for source, targets in sources]
+
+
+def solve_sources(job: SourceJob) -> List[Dict[int, List[str]]]:
+    """Run the searches of a job on a copy of the maze.
+
+    Runs inside a worker process.
+
+    Args:
+        job: The maze walls and the searches to run.
+
+    Returns:
+        The paths found from each source, as returned by search_sources.
+    """
+    maze = Maze(job.width, job.height, (0, 0), (0, 0))
+    maze.walls[:] = job.walls
+    return search_sources(PathFinder(maze), job.sources)
+
+
+class DistanceField:
+    """Breadth-first distances and predecessors from one source cell.
+
+    Neighbours are explored in the same order as PathFinder's "bfs"
+    strategy, so path_to returns the very path find_path would.
+    """
+
+    def __init__(self, maze: Maze, source: Tuple[int, int]):
+        """Run the search from a source cell.
+
+        Args:
+            maze: The maze to search.
+            source: The (x, y) coordinates distances are measured from.
+        """
+        self.maze = maze
+        self.source = source
+        self.finder = PathFinder(maze)
+        size = maze.width * maze.height
+        self.distance = array("l", [UNREACHED]) * size
+        self.came_from = bytearray(size)
+        self.build()
+
+    def build(self) -> None:
+        """Fill the distance and predecessor arrays."""
+        width = self.maze.width
+        walls = self.maze.walls
+        distance = self.distance
+        came_from = self.came_from
+        last_row = len(distance) - width
+        start = self.maze.index(*self.source)
+        distance[start] = 0
+        came_from[start] = START_MARK
+        queue: Deque[int] = deque([start])
+
+        while queue:
+            index = queue.popleft()
+            step = distance[index] + 1
+            mask = walls[index]
+            x = index % width
+            if not mask & NORTH and index >= width:
+                if not came_from[index - width]:
+                    came_from[index - width] = 1
+                    distance[index - width] = step
+                    queue.append(index - width)
+            if not mask & EAST and x < width - 1:
+                if not came_from[index + 1]:
+                    came_from[index + 1] = 2
+                    distance[index + 1] = step
+                    queue.append(index + 1)
+            if not mask & SOUTH and index < last_row:
+                if not came_from[index + width]:
+                    came_from[index + width] = 3
+                    distance[index + width] = step
+                    queue.append(index + width)
+            if not mask & WEST and x > 0:
+                if not came_from[index - 1]:
+                    came_from[index - 1] = 4
+                    distance[index - 1] = step
+                    queue.append(index - 1)
+
+    def distance_to(self, x: int, y: int) -> Optional[int]:
+        """Return the number of moves from the source to a cell.
+
+        Args:
+            x: The x-coordinate of the cell.
+            y: The y-coordinate of the cell.
+
+        Returns:
+            The distance, or None if the cell cannot be reached.
+        """
+        value = self.distance[self.maze.index(x, y)]
+        return None if value == UNREACHED else value
+
+    def path_to(self, x: int, y: int) -> Optional[List[str]]:
+        """Return a shortest path from the source to a cell.
+
+        Args:
+            x: The x-coordinate of the cell.
+            y: The y-coordinate of the cell.
+
+        Returns:
+            List of direction characters, or None if the cell cannot be
+            reached.
+        """
+        target = self.maze.index(x, y)
+        if not self.came_from[target]:
+            return None
+        return self.finder.rebuild_path(self.came_from, target)
+
+
+class TreeIndex:
+    """Lowest-common-ancestor index over the passages of a perfect maze.
+
+    Every connected part of the maze is rooted at its first cell in
+    row-major order. Besides its depth and the direction it was entered
+    from, each cell keeps one jump pointer to an ancestor, chosen so that
+    any ancestor is reached in O(log n) jumps and parent steps. This is
+    the skew-binary variant of binary lifting: one pointer per cell
+    instead of one per power of two.
+    """
+
+    def __init__(self, maze: Maze):
+        """Build the index.
+
+        Args:
+            maze: The maze to index.
+
+        Raises:
+            ValueError: If the maze has loops, i.e. is not perfect.
+        """
+        self.maze = maze
+        self.finder = PathFinder(maze)
+        width = maze.width
+        self.steps = (0, width, -1, -width, 1)
+        size = width * maze.height
+        self.depth = array("l", [UNREACHED]) * size
+        self.came_from = bytearray(size)
+        self.jump = array("l", [0]) * size
+        self.build()
+
+    def build(self) -> None:
+        """Root every connected part and fill depths and jump pointers.
+
+        Raises:
+            ValueError: If the maze has loops.
+        """
+        depth = self.depth
+        came_from = self.came_from
+        jump = self.jump
+        open_walls = 0
+        parts = 0
+        for root in range(len(depth)):
+            if came_from[root]:
+                continue
+            parts += 1
+            depth[root] = 0
+            came_from[root] = START_MARK
+            jump[root] = root
+            queue: Deque[int] = deque([root])
+            while queue:
+                index = queue.popleft()
+                for code, neighbor in self.finder.open_neighbors(index):
+                    open_walls += 1
+                    if came_from[neighbor]:
+                        continue
+                    came_from[neighbor] = code
+                    depth[neighbor] = depth[index] + 1
+                    # Jump twice as far when the parent's two jumps have
+                    # the same length, otherwise to the parent
+                    up = jump[index]
+                    if depth[index] - depth[up] == depth[up] - depth[jump[up]]:
+                        jump[neighbor] = jump[up]
+                    else:
+                        jump[neighbor] = index
+                    queue.append(neighbor)
+
+        # A forest has exactly one passage less than cells per part
+        if open_walls // 2 != len(depth) - parts:
+            raise ValueError("The maze has loops, it is not perfect")
+
+    def parent(self, index: int) -> int:
+        """Return the parent of a non-root cell.
+
+        Args:
+            index: The flat index of the cell.
+
+        Returns:
+            The flat index of the parent cell.
+        """
+        return index + self.steps[self.came_from[index]]
+
+    def ancestor(self, index: int, depth: int) -> int:
+        """Climb from a cell to its ancestor at a given depth.
+
+        Args:
+            index: The flat index of the cell.
+            depth: The depth of the wanted ancestor, at most the cell's.
+
+        Returns:
+            The flat index of the ancestor.
+        """
+        while self.depth[index] > depth:
+            up = self.jump[index]
+            index = up if self.depth[up] >= depth else self.parent(index)
+        return index
+
+    def common_ancestor(self, first: int, second: int) -> Optional[int]:
+        """Find the lowest common ancestor of two cells.
+
+        Args:
+            first: The flat index of the first cell.
+            second: The flat index of the second cell.
+
+        Returns:
+            The flat index of the ancestor, or None if the cells lie in
+            different parts of the maze.
+        """
+        if self.depth[first] < self.depth[second]:
+            first, second = second, first
+        first = self.ancestor(first, self.depth[second])
+        while first != second:
+            if self.depth[first] == 0:
+                return None
+            if self.jump[first] != self.jump[second]:
+                first, second = self.jump[first], self.jump[second]
+            else:
+                first, second = self.parent(first), self.parent(second)
+        return first
+
+    def distance(
+        self, start: Tuple[int, int], end: Tuple[int, int]
+    ) -> Optional[int]:
+        """Return the number of moves between two cells.
+
+        Args:
+            start: The (x, y) coordinates of the first cell.
+            end: The (x, y) coordinates of the second cell.
+
+        Returns:
+            The distance, or None if no path exists.
+        """
+        first = self.maze.index(*start)
+        second = self.maze.index(*end)
+        meet = self.common_ancestor(first, second)
+        if meet is None:
+            return None
+        return self.depth[first] + self.depth[second] - 2 * self.depth[meet]
+
+    def find_path(
+        self, start: Tuple[int, int], end: Tuple[int, int]
+    ) -> Optional[List[str]]:
+        """Return the path between two cells, in time proportional to it.
+
+        Args:
+            start: The (x, y) coordinates of the starting cell.
+            end: The (x, y) coordinates of the ending cell.
+
+        Returns:
+            List of direction characters, or None if no path exists.
+        """
+        first = self.maze.index(*start)
+        second = self.maze.index(*end)
+        meet = self.common_ancestor(first, second)
+        if meet is None:
+            return None
+        up = []
+        while first != meet:
+            up.append(DIRECTION_NAMES[OPPOSITE_CODES[self.came_from[first]]])
+            first = self.parent(first)
+        down = []
+        while second != meet:
+            down.append(DIRECTION_NAMES[self.came_from[second]])
+            second = self.parent(second)
+        down.reverse()
+        return up + down
+
+
+class PathIndex:
+    """Answers repeated distance and path queries on one maze.
+
+    Perfect mazes are served by a TreeIndex. Other mazes get one
+    DistanceField per source, the most recently used ones being kept.
+    Both are dropped and built again on the first query after the maze
+    generation counter moves, e.g. after MazeGenerator.generate or a wall
+    edit. Distances count moves. On a weighted maze with loops, the
+    cheapest path may not be the shortest one, so paths are searched
+    with PathFinder instead.
+    """
+
+    def __init__(self, maze: Maze, max_fields: int = 8):
+        """Initialize the index; nothing is built until the first query.
+
+        Args:
+            maze: The maze to answer queries on.
+            max_fields: How many distance fields to keep for mazes with
+                loops.
+        """
+        self.maze = maze
+        self.max_fields = max_fields
+        self.generation: Optional[int] = None
+        self.tree: Optional[TreeIndex] = None
+        self.fields: OrderedDict[Tuple[int, int], DistanceField] = (
+            OrderedDict())
+
+    def refresh(self) -> None:
+        """Drop the stale structures and index the maze again if needed."""
+        if self.generation == self.maze.generation:
+            return
+        self.fields.clear()
+        try:
+            self.tree = TreeIndex(self.maze)
+        except ValueError:
+            self.tree = None
+        self.generation = self.maze.generation
+
+    def field(self, source: Tuple[int, int]) -> DistanceField:
+        """Return the distance field from a source, building it if needed.
+
+        Args:
+            source: The (x, y) coordinates of the source cell.
+
+        Returns:
+            The distance field.
+        """
+        self.refresh()
+        found = self.fields.get(source)
+        if found is None:
+            found = DistanceField(self.maze, source)
+            self.fields[source] = found
+            while len(self.fields) > self.max_fields:
+                self.fields.popitem(last=False)
+        else:
+            self.fields.move_to_end(source)
+        return found
+
+    def distance(
+        self, start: Tuple[int, int], end: Tuple[int, int]
+    ) -> Optional[int]:
+        """Return the number of moves on a shortest path between two cells.
+
+        Args:
+            start: The (x, y) coordinates of the starting cell.
+            end: The (x, y) coordinates of the ending cell.
+
+        Returns:
+            The distance, or None if no path exists.
+        """
+        if not (self.maze.is_valid_position(*start)
+                and self.maze.is_valid_position(*end)):
+            return None
+        self.refresh()
+        if self.tree is not None:
+            return self.tree.distance(start, end)
+        return self.field(start).distance_to(*end)
+
+    def find_path(
+        self, start: Tuple[int, int], end: Tuple[int, int]
+    ) -> Optional[List[str]]:
+        """Return a shortest path between two cells.
+
+        Args:
+            start: The (x, y) coordinates of the starting cell.
+            end: The (x, y) coordinates of the ending cell.
+
+        Returns:
+            List of direction characters ('N', 'E', 'S', 'W'), or None if
+            no path exists.
+        """
+        if not (self.maze.is_valid_position(*start)
+                and self.maze.is_valid_position(*end)):
+            return None
+        self.refresh()
+        if self.tree is not None:
+            return self.tree.find_path(start, end)
+        if self.maze.costs is not None:
+            return PathFinder(self.maze).find_path(start, end)
+        return self.field(start).path_to(*end)
+
+    def find_paths(
+        self, pairs: Sequence[Query], workers: Optional[int] = None
+    ) -> List[Optional[List[str]]]:
+        """Answer a batch of path queries.
+
+        Every result equals what PathFinder(maze).find_path returns for
+        the same pair. Perfect mazes are answered from the tree index and
+        weighted mazes with loops by one weighted search per pair.
+        Otherwise queries are grouped by start cell, and one search per
+        start runs until all its end cells are reached, every search
+        reusing the same buffer.
+
+        Args:
+            pairs: The (start, end) coordinate pairs to solve.
+            workers: If more than 1, the searches of mazes with loops are
+                spread over that many processes, each getting a copy of
+                the walls.
+
+        Returns:
+            The path of each pair, in order, or None where no path exists.
+        """
+        maze = self.maze
+        results: List[Optional[List[str]]] = [None] * len(pairs)
+        valid = [number for number, (start, end) in enumerate(pairs)
+                 if maze.is_valid_position(*start)
+                 and maze.is_valid_position(*end)]
+        self.refresh()
+        if self.tree is not None:
+            for number in valid:
+                results[number] = self.tree.find_path(*pairs[number])
+            return results
+        if maze.costs is not None:
+            finder = PathFinder(maze)
+            for number in valid:
+                results[number] = finder.find_path(*pairs[number])
+            return results
+
+        groups: Dict[int, List[int]] = {}
+        for number in valid:
+            start, end = pairs[number]
+            groups.setdefault(maze.index(*start), []).append(
+                maze.index(*end))
+        sources = list(groups.items())
+        if workers is not None and workers > 1 and len(sources) > 1:
+            walls = bytes(maze.walls[:])
+            step = -(-len(sources) // (workers * 4))
+            jobs = [SourceJob(maze.width, maze.height, walls,
+                              sources[first:first + step])
+                    for first in range(0, len(sources), step)]
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                found = [paths for batch in pool.map(solve_sources, jobs)
+                         for paths in batch]
+        else:
+            found = search_sources(PathFinder(maze), sources)
+
+        by_source = {source: paths
+                     for (source, _), paths in zip(sources, found)}
+        for number in valid:
+            start, end = pairs[number]
+            path = by_source[maze.index(*start)].get(maze.index(*end))
+            results[number] = list(path) if path is not None else None
+        return results
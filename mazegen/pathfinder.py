@@ -1,28 +1,60 @@
 """Module for finding paths through a maze."""
 
-from collections import deque
+import heapq
+from array import array
+from collections import defaultdict, deque
+from mazegen import instrument
+from mazegen.cell import NORTH, EAST, SOUTH, WEST
 from mazegen.maze import Maze
-from typing import List, Optional, Tuple, Deque
+from typing import DefaultDict, Dict, List, Optional, Set, Tuple, Deque
+from typing import Union
+
+# Direction letters indexed by the codes stored in the predecessor array
+DIRECTION_NAMES = ("", "N", "E", "S", "W")
+OPPOSITE_CODES = (0, 3, 4, 1, 2)
+START_MARK = 5
+STRATEGIES = ("bfs", "astar", "bidirectional")
+# Above this many cells, search state is kept only for the cells touched
+SPARSE_CELLS = 1 << 26
+
+# Per-cell direction codes: dense for ordinary mazes, sparse for huge ones
+Marks = Union[bytearray, DefaultDict[int, int]]
 
 
 class PathFinder:
-    """Finds paths through a maze using breadth-first search (BFS).
+    """Finds shortest paths through a maze.
+
+    The search strategy is selectable: plain breadth-first search
+    ("bfs"), A* with a Manhattan heuristic ("astar") or a bidirectional
+    BFS meeting in the middle ("bidirectional"). All of them return a
+    shortest path; they differ in how many cells they expand.
 
-    Computes the shortest path between any two points in the maze.
+    On a maze with a cost layer, paths minimise the total cost of the
+    cells entered instead: "astar" then runs A* on the costs and the
+    other strategies run Dijkstra's algorithm.
     """
 
-    def __init__(self, maze: Maze):
+    def __init__(self, maze: Maze, strategy: str = "bfs"):
         """Initialize the pathfinder with a maze.
 
         Args:
             maze: The Maze object to find paths in.
+            strategy: The search strategy, one of "bfs", "astar" or
+                "bidirectional" (default: "bfs").
+
+        Raises:
+            ValueError: If the strategy is unknown.
         """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown search strategy: {strategy}")
         self.maze = maze
+        self.strategy = strategy
+        self.nodes_expanded = 0
 
     def find_path(
         self, start: Tuple[int, int], end: Tuple[int, int]
     ) -> Optional[List[str]]:
-        """Find the shortest path from start to end using BFS.
+        """Find the shortest path from start to end.
 
         Args:
             start: The (x, y) coordinates of the starting position.
@@ -32,36 +64,405 @@ class PathFinder:
             A list of direction characters ('N', 'E', 'S', 'W') representing
             the path, or None if no path exists.
         """
-        queue: Deque[Tuple[int, int, List]] = deque([(start[0], start[1], [])])
-        visited = set()
-        visited.add(start)
+        return self.search(start, end)[0]
+
+    @instrument.timed("find_path")
+    def search(
+        self, start: Tuple[int, int], end: Tuple[int, int]
+    ) -> Tuple[Optional[List[str]], int]:
+        """Find the shortest path and report how many cells were expanded.
+
+        The expansion count is also kept in ``nodes_expanded``.
+
+        Args:
+            start: The (x, y) coordinates of the starting position.
+            end: The (x, y) coordinates of the ending position.
+
+        Returns:
+            A tuple (path, nodes_expanded) where path is None if no path
+            exists.
+        """
+        self.nodes_expanded = 0
+        maze = self.maze
+        if not maze.is_valid_position(*start):
+            return None, 0
+        if not maze.is_valid_position(*end):
+            return None, 0
+
+        source = maze.index(*start)
+        target = maze.index(*end)
+        if maze.costs is not None:
+            path = self.weighted(source, target, maze.costs)
+        elif self.strategy == "astar":
+            path = self.astar(source, target)
+        elif self.strategy == "bidirectional":
+            path = self.bidirectional(source, target)
+        else:
+            path = self.bfs(source, target)
+        instrument.count("find_path.nodes_expanded", self.nodes_expanded)
+        return path, self.nodes_expanded
+
+    def new_marks(self) -> Marks:
+        """Allocate the per-cell direction codes of one search.
+
+        Mazes too large to allocate a byte per cell, such as chunked
+        mazes, get a dict holding only the cells the search touches.
+
+        Returns:
+            A zero-filled bytearray, or a dict defaulting to zero.
+        """
+        size = self.maze.width * self.maze.height
+        if size > SPARSE_CELLS:
+            return defaultdict(int)
+        return bytearray(size)
+
+    def bfs(self, source: int, target: int) -> Optional[List[str]]:
+        """Run a breadth-first search between two flat cell indices.
+
+        Each reached cell records, in the marks from new_marks, the
+        direction used to enter it; the path is rebuilt once at the end by
+        walking those directions back from the target.
+
+        Args:
+            source: The flat index of the starting cell.
+            target: The flat index of the target cell.
+
+        Returns:
+            The list of direction characters, or None if no path exists.
+        """
+        maze = self.maze
+        width = maze.width
+        walls = maze.walls
+        last_row = len(walls) - width
+        came_from = self.new_marks()
+        came_from[source] = START_MARK
+        queue: Deque[int] = deque([source])
+
+        expanded = 0
 
         while queue:
-            x, y, path = queue.popleft()
+            index = queue.popleft()
+            expanded += 1
+            if index == target:
+                self.nodes_expanded = expanded
+                return self.rebuild_path(came_from, target)
+
+            mask = walls[index]
+            x = index % width
+            if not mask & NORTH and index >= width:
+                if not came_from[index - width]:
+                    came_from[index - width] = 1
+                    queue.append(index - width)
+            if not mask & EAST and x < width - 1:
+                if not came_from[index + 1]:
+                    came_from[index + 1] = 2
+                    queue.append(index + 1)
+            if not mask & SOUTH and index < last_row:
+                if not came_from[index + width]:
+                    came_from[index + width] = 3
+                    queue.append(index + width)
+            if not mask & WEST and x > 0:
+                if not came_from[index - 1]:
+                    came_from[index - 1] = 4
+                    queue.append(index - 1)
+
+        self.nodes_expanded = expanded
+        return None
+
+    def bfs_targets(self, source: int, targets: Set[int],
+                    came_from: Marks) -> Dict[int, List[str]]:
+        """Run one breadth-first search until several targets are reached.
+
+        Cells are expanded in the same order as in bfs and a recorded
+        direction never changes, so every path is the one bfs returns for
+        that target. The marks are borrowed from the caller, who can reuse
+        them for the next source instead of allocating new ones.
+
+        Args:
+            source: The flat index of the starting cell.
+            targets: The flat indices of the cells to find paths to.
+            came_from: Marks from new_marks, all zero; they are zero again
+                when the method returns.
+
+        Returns:
+            The path to each reached target; unreachable targets are left
+            out.
+        """
+        maze = self.maze
+        width = maze.width
+        walls = maze.walls
+        last_row = width * maze.height - width
+        remaining = set(targets)
+        paths = {}
+        came_from[source] = START_MARK
+        # The queue keeps every reached cell, to clear the marks afterwards
+        queue = [source]
+        head = 0
+
+        while head < len(queue) and remaining:
+            index = queue[head]
+            head += 1
+            if index in remaining:
+                remaining.discard(index)
+                paths[index] = self.rebuild_path(came_from, index)
+
+            mask = walls[index]
+            x = index % width
+            if not mask & NORTH and index >= width:
+                if not came_from[index - width]:
+                    came_from[index - width] = 1
+                    queue.append(index - width)
+            if not mask & EAST and x < width - 1:
+                if not came_from[index + 1]:
+                    came_from[index + 1] = 2
+                    queue.append(index + 1)
+            if not mask & SOUTH and index < last_row:
+                if not came_from[index + width]:
+                    came_from[index + width] = 3
+                    queue.append(index + width)
+            if not mask & WEST and x > 0:
+                if not came_from[index - 1]:
+                    came_from[index - 1] = 4
+                    queue.append(index - 1)
+
+        self.nodes_expanded = head
+        if isinstance(came_from, bytearray):
+            for index in queue:
+                came_from[index] = 0
+        else:
+            came_from.clear()
+        return paths
 
-            if (x, y) == end:
-                return path
+    def open_neighbors(self, index: int) -> List[Tuple[int, int]]:
+        """List the cells reachable in one step from a cell.
 
-            cell = self.maze.get_cell(x, y)
-            if cell:
-                if not cell.north and (x, y - 1) not in visited:
-                    if self.maze.is_valid_position(x, y - 1):
-                        visited.add((x, y - 1))
-                        queue.append((x, y - 1, path + ["N"]))
+        Args:
+            index: The flat index of the cell.
+
+        Returns:
+            A list of (direction code, neighbor index) pairs in N, E, S, W
+            order, direction codes being 1-4.
+        """
+        width = self.maze.width
+        mask = self.maze.walls[index]
+        x = index % width
+        neighbors = []
+        if not mask & NORTH and index >= width:
+            neighbors.append((1, index - width))
+        if not mask & EAST and x < width - 1:
+            neighbors.append((2, index + 1))
+        if not mask & SOUTH and index < len(self.maze.walls) - width:
+            neighbors.append((3, index + width))
+        if not mask & WEST and x > 0:
+            neighbors.append((4, index - 1))
+        return neighbors
 
-                if not cell.east and (x + 1, y) not in visited:
-                    if self.maze.is_valid_position(x + 1, y):
-                        visited.add((x + 1, y))
-                        queue.append((x + 1, y, path + ["E"]))
+    def astar(self, source: int, target: int) -> Optional[List[str]]:
+        """Run an A* search with a Manhattan distance heuristic.
 
-                if not cell.south and (x, y + 1) not in visited:
-                    if self.maze.is_valid_position(x, y + 1):
-                        visited.add((x, y + 1))
-                        queue.append((x, y + 1, path + ["S"]))
+        The heuristic is consistent on a unit-cost grid, so the first time
+        the target is popped its path is a shortest one. Stale heap entries
+        are skipped instead of being decreased in place.
 
-                if not cell.west and (x - 1, y) not in visited:
-                    if self.maze.is_valid_position(x - 1, y):
-                        visited.add((x - 1, y))
-                        queue.append((x - 1, y, path + ["W"]))
+        Args:
+            source: The flat index of the starting cell.
+            target: The flat index of the target cell.
 
+        Returns:
+            The list of direction characters, or None if no path exists.
+        """
+        width = self.maze.width
+        target_x, target_y = target % width, target // width
+        came_from = self.new_marks()
+        came_from[source] = START_MARK
+        closed = self.new_marks()
+        cost: Union[List[int], DefaultDict[int, int]]
+        if isinstance(closed, bytearray):
+            cost = [-1] * len(closed)
+        else:
+            cost = defaultdict(lambda: -1)
+        cost[source] = 0
+        heap = [(0, 0, source)]
+        expanded = 0
+
+        while heap:
+            _, g, index = heapq.heappop(heap)
+            if closed[index]:
+                continue
+            closed[index] = 1
+            expanded += 1
+            if index == target:
+                self.nodes_expanded = expanded
+                return self.rebuild_path(came_from, target)
+            for code, nxt in self.open_neighbors(index):
+                if closed[nxt]:
+                    continue
+                if cost[nxt] == -1 or g + 1 < cost[nxt]:
+                    cost[nxt] = g + 1
+                    came_from[nxt] = code
+                    h = (abs(nxt % width - target_x)
+                         + abs(nxt // width - target_y))
+                    heapq.heappush(heap, (g + 1 + h, g + 1, nxt))
+
+        self.nodes_expanded = expanded
         return None
+
+    def weighted(self, source: int, target: int,
+                 costs: bytearray) -> Optional[List[str]]:
+        """Run Dijkstra's algorithm, or A* for "astar", on the cell costs.
+
+        Entering a cell costs the cell's cost. The best known cost of
+        every cell is kept in one flat array; instead of decreasing a key
+        in the heap, a cheaper route pushes a new entry and entries whose
+        cost no longer matches the array are skipped when popped. A* uses
+        the Manhattan distance times the cheapest cell cost, which never
+        overestimates, so the first time the target is popped its path is
+        a cheapest one.
+
+        Args:
+            source: The flat index of the starting cell.
+            target: The flat index of the target cell.
+            costs: The cost of entering each cell.
+
+        Returns:
+            The list of direction characters, or None if no path exists.
+        """
+        maze = self.maze
+        width = maze.width
+        target_x, target_y = target % width, target // width
+        scale = min(costs) if self.strategy == "astar" else 0
+        came_from = self.new_marks()
+        came_from[source] = START_MARK
+        best: Union[array, DefaultDict[int, int]]
+        if isinstance(came_from, bytearray):
+            best = array("q", [-1]) * len(came_from)
+        else:
+            best = defaultdict(lambda: -1)
+        best[source] = 0
+        heap = [(0, 0, source)]
+        expanded = 0
+
+        while heap:
+            _, g, index = heapq.heappop(heap)
+            if g != best[index]:
+                continue
+            expanded += 1
+            if index == target:
+                self.nodes_expanded = expanded
+                return self.rebuild_path(came_from, target)
+            for code, nxt in self.open_neighbors(index):
+                cost = g + costs[nxt]
+                if best[nxt] == -1 or cost < best[nxt]:
+                    best[nxt] = cost
+                    came_from[nxt] = code
+                    h = scale * (abs(nxt % width - target_x)
+                                 + abs(nxt // width - target_y))
+                    heapq.heappush(heap, (cost + h, cost, nxt))
+
+        self.nodes_expanded = expanded
+        return None
+
+    def bidirectional(self, source: int,
+                      target: int) -> Optional[List[str]]:
+        """Run two breadth-first searches that meet in the middle.
+
+        Whole levels are expanded alternately from the side with the
+        smaller frontier. The first edge joining both searches lies on a
+        shortest path, because any shorter path would have met earlier.
+
+        Args:
+            source: The flat index of the starting cell.
+            target: The flat index of the target cell.
+
+        Returns:
+            The list of direction characters, or None if no path exists.
+        """
+        if source == target:
+            self.nodes_expanded = 1
+            return []
+        forward = self.new_marks()
+        backward = self.new_marks()
+        forward[source] = START_MARK
+        backward[target] = START_MARK
+        forward_level = [source]
+        backward_level = [target]
+        expanded = 0
+
+        while forward_level and backward_level:
+            from_forward = len(forward_level) <= len(backward_level)
+            if from_forward:
+                level, own, other = forward_level, forward, backward
+            else:
+                level, own, other = backward_level, backward, forward
+            next_level = []
+            for index in level:
+                expanded += 1
+                for code, nxt in self.open_neighbors(index):
+                    if own[nxt]:
+                        continue
+                    if other[nxt]:
+                        self.nodes_expanded = expanded
+                        if from_forward:
+                            return self.join_paths(
+                                forward, backward, index, code, nxt)
+                        return self.join_paths(
+                            forward, backward, nxt, OPPOSITE_CODES[code],
+                            index)
+                    own[nxt] = code
+                    next_level.append(nxt)
+            if from_forward:
+                forward_level = next_level
+            else:
+                backward_level = next_level
+
+        self.nodes_expanded = expanded
+        return None
+
+    def join_paths(self, forward: Marks, backward: Marks,
+                   meet_from: int, code: int, meet_to: int) -> List[str]:
+        """Join the two halves of a bidirectional search into one path.
+
+        Args:
+            forward: Direction codes recorded by the search from the start.
+            backward: Direction codes recorded by the search from the target.
+            meet_from: The cell reached by the forward search.
+            code: The direction code leading from meet_from to meet_to.
+            meet_to: The cell reached by the backward search.
+
+        Returns:
+            The list of direction characters from the start to the target.
+        """
+        width = self.maze.width
+        steps = (0, width, -1, -width, 1)
+        path = self.rebuild_path(forward, meet_from)
+        path.append(DIRECTION_NAMES[code])
+        index = meet_to
+        code = backward[index]
+        while code != START_MARK:
+            path.append(DIRECTION_NAMES[OPPOSITE_CODES[code]])
+            index += steps[code]
+            code = backward[index]
+        return path
+
+    def rebuild_path(self, came_from: Marks, target: int) -> List[str]:
+        """Rebuild a path by following recorded directions back to the start.
+
+        Args:
+            came_from: Per-cell direction codes (1-4 for N/E/S/W, 5 for the
+                start cell, 0 for unreached cells).
+            target: The flat index of the cell the path ends at.
+
+        Returns:
+            The list of direction characters from the start to the target.
+        """
+        width = self.maze.width
+        steps = (0, width, -1, -width, 1)
+        path = []
+        index = target
+        code = came_from[index]
+        while code != START_MARK:
+            path.append(DIRECTION_NAMES[code])
+            index += steps[code]
+            code = came_from[index]
+        path.reverse()
+        return path
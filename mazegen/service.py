@@ -0,0 +1,447 @@
+"""Module serving maze generation over HTTP on localhost.
+
+Usage: python3 -m mazegen.service [--host HOST] [--port PORT]
+       [--workers N] [--cache-dir DIR] [--max-cells N]
+
+GET /maze takes the config file keys as query parameters, e.g.
+/maze?WIDTH=20&HEIGHT=15&ENTRY=0,0&EXIT=19,14&SEED=42&PERFECT=True, and
+answers with the maze in the hex output format. GET /metrics answers
+with the request counters, queue depth and latency percentiles as JSON.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from mazegen.batch import BatchJob, BatchResult, build_maze
+from mazegen.config_parser import ConfigParser
+from mazegen.generator import ALGORITHMS
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+MAX_CELLS = 4_000_000
+STREAM_BLOCK = 64 * 1024
+REQUEST_TIMEOUT = 10.0
+MAX_HEADERS = 100
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+def parse_job(
+    query: Dict[str, str], cache_dir: Optional[str] = None,
+    max_cells: int = MAX_CELLS
+) -> BatchJob:
+    """Validate the query parameters of a maze request.
+
+    Args:
+        query: The config keys and values from the query string.
+        cache_dir: The maze cache directory, if the service uses one.
+        max_cells: The largest maze the service builds.
+
+    Returns:
+        The job to build. Without a SEED, a random one is picked, so the
+        request is never coalesced with another, and the cache is
+        bypassed since its entry could never be hit again.
+
+    Raises:
+        ValueError: If a parameter is missing or invalid.
+    """
+    config = ConfigParser.from_mapping(query, "request")
+    try:
+        width = config.get_int("WIDTH")
+        height = config.get_int("HEIGHT")
+        entry = config.get_tuple("ENTRY")
+        exit_pos = config.get_tuple("EXIT")
+        seeded = bool(config.get("SEED"))
+        seed = (config.get_int("SEED") if seeded
+                else random.getrandbits(31))
+        perfect = (config.get_bool("PERFECT") if config.get("PERFECT")
+                   else True)
+        loop_percentage = config.get_float("LOOP_PERCENTAGE", 0.15)
+    except KeyError as e:
+        raise ValueError(str(e).strip("'")) from None
+    except SystemExit:
+        raise ValueError("Invalid ENTRY or EXIT") from None
+    algorithm = config.get("ALGORITHM", "backtracker") or "backtracker"
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown ALGORITHM: {algorithm}")
+    if not 0 <= loop_percentage <= 1:
+        raise ValueError("LOOP_PERCENTAGE must be between 0 and 1")
+    if not 0 < width * height <= max_cells:
+        raise ValueError(f"Maze size must be between 1 and {max_cells} "
+                         f"cells")
+    for name, (x, y) in (("ENTRY", entry), ("EXIT", exit_pos)):
+        if not (0 <= x < width and 0 <= y < height):
+            raise ValueError(f"{name} is outside the maze")
+    return BatchJob(width, height, entry, exit_pos, seed, perfect,
+                    algorithm, None, loop_percentage,
+                    cache_dir if seeded else None)
+
+
+class ServiceMetrics:
+    """Request counters and a sliding window of request latencies."""
+
+    def __init__(self, window: int = 1000):
+        """Initialize empty counters.
+
+        Args:
+            window: How many recent latencies the percentiles cover.
+        """
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.requests = 0
+        self.computed = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.pool_restarts = 0
+
+    def record(self, seconds: float) -> None:
+        """Record the latency of one maze request.
+
+        Args:
+            seconds: Time from the request being read to its last byte
+                being sent.
+        """
+        self.latencies.append(seconds)
+
+    def latency_summary(self) -> Dict[str, float]:
+        """Summarize the recent latencies.
+
+        Returns:
+            The count, mean, median, 95th percentile and maximum, the
+            times in milliseconds.
+        """
+        ordered = sorted(self.latencies)
+        if not ordered:
+            return {"count": 0}
+
+        def percentile(fraction: float) -> float:
+            return ordered[int(fraction * (len(ordered) - 1))] * 1000
+
+        return {
+            "count": len(ordered),
+            "mean": sum(ordered) / len(ordered) * 1000,
+            "p50": percentile(0.5),
+            "p95": percentile(0.95),
+            "max": ordered[-1] * 1000,
+        }
+
+
+class MazeService:
+    """Builds mazes for HTTP clients on a process pool.
+
+    Requests for the same maze that arrive while it is being built share
+    the one computation instead of queueing another: the in-flight jobs
+    are kept in a dict, keyed by the job parameters, until they finish.
+    """
+
+    def __init__(self, workers: Optional[int] = None,
+                 cache_dir: Optional[str] = None,
+                 max_cells: int = MAX_CELLS):
+        """Start the worker pool.
+
+        Args:
+            workers: Number of worker processes (default: CPU count).
+            cache_dir: Optional maze cache directory shared by the
+                workers.
+            max_cells: The largest maze the service builds.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = self.new_pool()
+        self.cache_dir = cache_dir
+        self.max_cells = max_cells
+        self.in_flight: Dict[BatchJob, "asyncio.Future[BatchResult]"] = {}
+        self.waiting = 0
+        self.metrics = ServiceMetrics()
+
+    def new_pool(self) -> ProcessPoolExecutor:
+        """Create a worker pool.
+
+        Returns:
+            A pool of self.workers processes.
+        """
+        # Workers are started on demand; forked ones would inherit the
+        # client sockets open at that time and keep them from closing
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"))
+
+    def restart_pool(self, broken: ProcessPoolExecutor) -> None:
+        """Replace a pool that lost a worker, once for all its jobs.
+
+        Args:
+            broken: The pool that raised BrokenProcessPool.
+        """
+        if broken is not self.pool:
+            return
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.pool = self.new_pool()
+        self.metrics.pool_restarts += 1
+        print("Worker pool broken, restarted", file=sys.stderr, flush=True)
+
+    async def compute(self, job: BatchJob) -> BatchResult:
+        """Run a job on the worker pool, surviving the loss of a worker.
+
+        When a worker dies (killed, out of memory), the pool refuses all
+        further work. The pool is then replaced and the job retried
+        once; a job that breaks the new pool too fails on its own.
+
+        Args:
+            job: The maze to build.
+
+        Returns:
+            The result of build_maze.
+
+        Raises:
+            BrokenProcessPool: If the job broke the pool twice.
+        """
+        loop = asyncio.get_running_loop()
+        pool = self.pool
+        try:
+            return await loop.run_in_executor(pool, build_maze, job)
+        except BrokenProcessPool:
+            self.restart_pool(pool)
+        return await loop.run_in_executor(self.pool, build_maze, job)
+
+    def close(self) -> None:
+        """Shut the worker pool down."""
+        self.pool.shutdown(cancel_futures=True)
+
+    async def start(self, host: str, port: int) -> asyncio.Server:
+        """Start listening for connections.
+
+        Args:
+            host: The address to bind, normally a loopback address.
+            port: The TCP port to listen on (0 for any free port).
+
+        Returns:
+            The listening server.
+        """
+        return await asyncio.start_server(self.handle, host, port)
+
+    async def build(self, job: BatchJob) -> Tuple[BatchResult, bool]:
+        """Build a maze, joining the computation already running for it.
+
+        Args:
+            job: The maze to build.
+
+        Returns:
+            A tuple (result, coalesced), coalesced being True when the
+            result came from another request's computation.
+
+        Raises:
+            ValueError: If the generator rejects the entry or exit.
+        """
+        future = self.in_flight.get(job)
+        coalesced = future is not None
+        if future is None:
+            future = asyncio.ensure_future(self.compute(job))
+            self.in_flight[job] = future
+            future.add_done_callback(
+                lambda _: self.in_flight.pop(job, None))
+            self.metrics.computed += 1
+        else:
+            self.metrics.coalesced += 1
+        self.waiting += 1
+        try:
+            # A client hanging up must not cancel the shared computation
+            return await asyncio.shield(future), coalesced
+        finally:
+            self.waiting -= 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Collect the current metrics.
+
+        Returns:
+            The counters, queue depth and latency summary.
+        """
+        return {
+            "requests": self.metrics.requests,
+            "computed": self.metrics.computed,
+            "coalesced": self.metrics.coalesced,
+            "errors": self.metrics.errors,
+            "pool_restarts": self.metrics.pool_restarts,
+            "in_flight": len(self.in_flight),
+            "queued": max(0, len(self.in_flight) - self.workers),
+            "waiting_clients": self.waiting,
+            "latency_ms": self.metrics.latency_summary(),
+        }
+
+    async def handle(self, reader: asyncio.StreamReader,
+                     writer: asyncio.StreamWriter) -> None:
+        """Serve one HTTP request, then close the connection.
+
+        Args:
+            reader: The stream of the client request.
+            writer: The stream to the client.
+        """
+        try:
+            request = await asyncio.wait_for(self.read_request(reader),
+                                             REQUEST_TIMEOUT)
+            if request is None:
+                return
+            method, target = request
+            await self.dispatch(writer, method, target)
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def read_request(
+        self, reader: asyncio.StreamReader
+    ) -> Optional[Tuple[str, str]]:
+        """Read the request line and skip the headers.
+
+        Args:
+            reader: The stream of the client request.
+
+        Returns:
+            A tuple (method, target), or None for a malformed request.
+        """
+        parts = (await reader.readline()).decode("latin-1").split()
+        for _ in range(MAX_HEADERS):
+            if (await reader.readline()).strip() == b"":
+                break
+        if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+            return None
+        return parts[0], parts[1]
+
+    async def dispatch(self, writer: asyncio.StreamWriter, method: str,
+                       target: str) -> None:
+        """Route a request and write the response.
+
+        Args:
+            writer: The stream to the client.
+            method: The HTTP method.
+            target: The request target, path and query string.
+        """
+        url = urlsplit(target)
+        if url.path not in ("/maze", "/metrics"):
+            await self.respond(writer, 404, b"Unknown path\n")
+            return
+        if method != "GET":
+            await self.respond(writer, 405, b"Only GET is supported\n")
+            return
+        if url.path == "/metrics":
+            body = json.dumps(self.snapshot(), indent=2) + "\n"
+            await self.respond(writer, 200, body.encode(),
+                               "application/json")
+            return
+
+        started = time.perf_counter()
+        self.metrics.requests += 1
+        status, coalesced = 200, False
+        try:
+            job = parse_job(dict(parse_qsl(url.query)), self.cache_dir,
+                            self.max_cells)
+            result, coalesced = await self.build(job)
+            elapsed = (time.perf_counter() - started) * 1000
+            headers = [f"X-Maze-Seed: {job.seed}",
+                       f"X-Coalesced: {'yes' if coalesced else 'no'}",
+                       f"Server-Timing: build;dur={elapsed:.1f}"]
+            await self.respond(writer, 200,
+                               (result.text or "").encode("ascii"),
+                               headers=headers)
+        except ValueError as e:
+            status = 400
+            self.metrics.errors += 1
+            await self.respond(writer, 400, f"{e}\n".encode())
+        except Exception as e:
+            status = 500
+            self.metrics.errors += 1
+            await self.respond(writer, 500, f"{e}\n".encode())
+        seconds = time.perf_counter() - started
+        self.metrics.record(seconds)
+        print(f"{method} {target} {status} {seconds * 1000:.1f}ms"
+              f"{' (coalesced)' if coalesced else ''}", flush=True)
+
+    async def respond(
+        self, writer: asyncio.StreamWriter, status: int, body: bytes,
+        content_type: str = "text/plain; charset=ascii",
+        headers: Optional[List[str]] = None
+    ) -> None:
+        """Write a response, streaming the body in bounded blocks.
+
+        Each block waits for the socket buffer to drain, so a large maze
+        is not copied into the transport all at once and slow clients
+        only hold one block in memory.
+
+        Args:
+            writer: The stream to the client.
+            status: The HTTP status code.
+            body: The response body.
+            content_type: The Content-Type header value.
+            headers: Extra header lines.
+        """
+        lines = [f"HTTP/1.1 {status} {REASONS[status]}",
+                 f"Content-Type: {content_type}",
+                 f"Content-Length: {len(body)}",
+                 "Connection: close"]
+        lines.extend(headers or [])
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        view = memoryview(body)
+        for start in range(0, len(body), STREAM_BLOCK):
+            writer.write(view[start:start + STREAM_BLOCK])
+            await writer.drain()
+        await writer.drain()
+
+
+async def serve(host: str, port: int, workers: Optional[int],
+                cache_dir: Optional[str], max_cells: int) -> None:
+    """Run the service until interrupted.
+
+    Args:
+        host: The address to bind.
+        port: The TCP port to listen on.
+        workers: Number of worker processes (default: CPU count).
+        cache_dir: Optional maze cache directory.
+        max_cells: The largest maze the service builds.
+    """
+    service = MazeService(workers, cache_dir, max_cells)
+    try:
+        server = await service.start(host, port)
+        address = server.sockets[0].getsockname()
+        print(f"Serving mazes on http://{address[0]}:{address[1]}/maze",
+              flush=True)
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main() -> None:
+    """Parse the command line and run the service."""
+    parser = argparse.ArgumentParser(
+        prog="python3 -m mazegen.service",
+        description="Serve maze generation over HTTP.",
+    )
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="address to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8042,
+                        help="port to listen on (default: 8042)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: CPU count)")
+    parser.add_argument("--cache-dir", default=None,
+                        help="maze cache directory (default: none)")
+    parser.add_argument("--max-cells", type=int, default=MAX_CELLS,
+                        help=f"largest maze served (default: {MAX_CELLS})")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers,
+                          args.cache_dir, args.max_cells))
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""Module for streaming maze generation using Eller's algorithm."""
+
+import random
+import sys
+from mazegen.cell import NORTH, EAST, SOUTH, WEST, ALL_WALLS
+from mazegen.generator import pattern_positions
+from mazegen.maze import HEX_DIGITS
+from typing import Dict, List, Optional, Set, Tuple
+
+
+class StreamingGenerator:
+    """Generates a maze one row at a time with Eller's algorithm.
+
+    Only the current row is kept in memory: every row is written to the
+    output file, in the same hex format as Maze.to_file, as soon as its
+    walls are final. Memory use is O(width) whatever the height, so mazes
+    far larger than RAM can be produced.
+
+    The '42' pattern cells are kept as fully walled obstacles. Rows close
+    to the pattern are planned ahead so that no set of cells is ever led
+    into a pocket it cannot leave, keeping the maze connected.
+    """
+
+    def __init__(
+        self, width: int, height: int, entry: tuple[int, int],
+        exit: tuple[int, int], seed: Optional[int] = None
+    ):
+        """Initialize the streaming generator.
+
+        Args:
+            width: The width of the maze in cells.
+            height: The height of the maze in cells.
+            entry: The (x, y) coordinates of the maze entry point.
+            exit: The (x, y) coordinates of the maze exit point.
+            seed: Optional random seed for reproducible generation.
+        """
+        self.width = width
+        self.height = height
+        self.entry = entry
+        self.exit = exit
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.pattern_42_cells = pattern_positions(width, height)
+        self.obstacles: Dict[int, Set[int]] = {}
+        for x, y in self.pattern_42_cells:
+            self.obstacles.setdefault(y, set()).add(x)
+        self.capable: Dict[int, bytearray] = {}
+        self.pockets: Dict[int, List[List[int]]] = {}
+        self.plan_obstacles()
+
+    def runs(self, blocked: Set[int]) -> List[Tuple[int, int]]:
+        """Split a row into maximal runs of cells that are not obstacles.
+
+        Args:
+            blocked: The x-coordinates of obstacle cells in the row.
+
+        Returns:
+            A list of half-open (start, end) ranges of free cells.
+        """
+        result = []
+        start = 0
+        for x in sorted(blocked):
+            if x > start:
+                result.append((start, x))
+            start = x + 1
+        if start < self.width:
+            result.append((start, self.width))
+        return result
+
+    def plan_obstacles(self) -> None:
+        """Precompute which cells may safely carry a set down a row.
+
+        Working upwards from the bottom of the pattern, a run of free cells
+        is viable when one of its cells can go down into a viable run of
+        the next row. For each row next to the pattern this records the
+        cells whose downward passage is viable ("capable" cells) and the
+        non-viable pockets below that must be fed from above.
+        """
+        if not self.obstacles:
+            return
+        width = self.width
+        top = min(self.obstacles)
+        bottom = min(max(self.obstacles), self.height - 1)
+        below: Optional[bytearray] = None
+
+        for y in range(bottom, max(top - 1, 0) - 1, -1):
+            blocked = self.obstacles.get(y, set())
+            if y == self.height - 1:
+                below = bytearray(
+                    0 if x in blocked else 1 for x in range(width)
+                )
+                continue
+
+            next_viable = below if below is not None else (
+                bytearray([1]) * width)
+            capable = bytearray(
+                0 if x in blocked else next_viable[x] for x in range(width)
+            )
+            self.capable[y] = capable
+
+            if below is not None:
+                pockets = []
+                for start, end in self.runs(self.obstacles.get(y + 1, set())):
+                    if any(below[start:end]):
+                        continue
+                    feeders = [x for x in range(start, end)
+                               if x not in blocked]
+                    if feeders:
+                        pockets.append(feeders)
+                self.pockets[y] = pockets
+
+            viable = bytearray(width)
+            for start, end in self.runs(blocked):
+                if any(capable[start:end]):
+                    viable[start:end] = bytes([1]) * (end - start)
+            below = viable
+
+    def check_endpoints(self) -> None:
+        """Validate that entry and exit lie inside the maze, off the pattern.
+
+        Raises:
+            SystemExit: If the entry or exit is invalid.
+        """
+        start_x, start_y = self.entry
+        end_x, end_y = self.exit
+        if start_x >= self.width or start_y >= self.height:
+            print("Invalid Entry dimensions")
+            sys.exit(1)
+        if end_x >= self.width or end_y >= self.height:
+            print("Invalid Exit dimensions")
+            sys.exit(1)
+        if start_x in self.obstacles.get(start_y, set()):
+            sys.exit("entry provided conflict with 42 pattern")
+        if end_x in self.obstacles.get(end_y, set()):
+            sys.exit("exit provided conflict with 42 pattern")
+
+    def find(self, parent: List[int], label: int) -> int:
+        """Find the representative of a set label, halving paths.
+
+        Args:
+            parent: The union-find parent table of the current row.
+            label: The label to look up.
+
+        Returns:
+            The representative label of the set.
+        """
+        while parent[label] != label:
+            parent[label] = parent[parent[label]]
+            label = parent[label]
+        return label
+
+    def write(
+        self, filepath: str | None, perfect: bool = True,
+        loop_percentage: float = 0.15
+    ) -> None:
+        """Generate the maze and stream it to a file row by row.
+
+        The solution line is left empty: finding the path needs the whole
+        maze, which this mode deliberately never holds in memory.
+
+        Args:
+            filepath: The path where the maze file will be written.
+            perfect: If True, generates a perfect maze (tree structure).
+                    If False, also opens extra walls inside each row.
+            loop_percentage: For imperfect mazes, the probability that a
+                cell opens an extra wall to its east (default: 0.15).
+        """
+        self.check_endpoints()
+        self.rng.seed(self.seed)
+
+        width = self.width
+        labels = [-1] * width
+        north_open = bytearray(width)
+
+        with open(str(filepath), "w") as f:
+            for y in range(self.height):
+                last = y == self.height - 1
+                blocked = self.obstacles.get(y, set())
+                parent = list(range(2 * width))
+                row = bytearray([ALL_WALLS]) * width
+
+                # Carry sets down from the previous row, new sets elsewhere
+                label = [-1] * width
+                fresh = width
+                for x in range(width):
+                    if x in blocked:
+                        continue
+                    if north_open[x]:
+                        row[x] &= ~NORTH
+                        label[x] = labels[x]
+                    else:
+                        label[x] = fresh
+                        fresh += 1
+
+                # Randomly join neighbouring sets; join all on the last row
+                for x in range(width - 1):
+                    if label[x] < 0 or label[x + 1] < 0:
+                        continue
+                    left = self.find(parent, label[x])
+                    right = self.find(parent, label[x + 1])
+                    if left != right and (last or self.rng.random() < 0.5):
+                        row[x] &= ~EAST
+                        row[x + 1] &= ~WEST
+                        parent[right] = left
+
+                if not last:
+                    down = self.connect_down(row, label, parent, y)
+                else:
+                    down = bytearray(width)
+
+                if not perfect:
+                    for x in range(width - 1):
+                        if label[x] < 0 or label[x + 1] < 0:
+                            continue
+                        if not row[x] & EAST:
+                            continue
+                        if self.rng.random() < loop_percentage:
+                            row[x] &= ~EAST
+                            row[x + 1] &= ~WEST
+                            left = self.find(parent, label[x])
+                            right = self.find(parent, label[x + 1])
+                            parent[right] = left
+
+                f.write(bytes(row.translate(HEX_DIGITS)).decode("ascii"))
+                f.write("\n")
+
+                # Compact the labels handed to the next row to [0, width)
+                compact: Dict[int, int] = {}
+                for x in range(width):
+                    if down[x]:
+                        root = self.find(parent, label[x])
+                        labels[x] = compact.setdefault(root, len(compact))
+                    else:
+                        labels[x] = -1
+                north_open = down
+
+            f.write("\n")
+            f.write(f"{self.entry[0]},{self.entry[1]}\n")
+            f.write(f"{self.exit[0]},{self.exit[1]}\n")
+            f.write("\n")
+
+    def connect_down(
+        self, row: bytearray, label: List[int], parent: List[int], y: int
+    ) -> bytearray:
+        """Open the south walls that carry every set into the next row.
+
+        Near the pattern, sets without a capable cell are first merged with
+        a neighbour in their run, then each set gets at least one passage
+        through a capable cell and every pocket below is fed once.
+
+        Args:
+            row: The wall masks of the current row, updated in place.
+            label: The set label of each cell, -1 for obstacles.
+            parent: The union-find parent table of the current row.
+            y: The index of the current row.
+
+        Returns:
+            A bytearray flagging the cells whose south wall was opened.
+        """
+        width = self.width
+        capable = self.capable.get(y)
+
+        if capable is not None:
+            good: Dict[int, bool] = {}
+            for x in range(width):
+                if label[x] >= 0 and capable[x]:
+                    good[self.find(parent, label[x])] = True
+            for x in range(width - 1):
+                if label[x] < 0 or label[x + 1] < 0:
+                    continue
+                left = self.find(parent, label[x])
+                right = self.find(parent, label[x + 1])
+                if left == right or (good.get(left) and good.get(right)):
+                    continue
+                row[x] &= ~EAST
+                row[x + 1] &= ~WEST
+                parent[right] = left
+                good[left] = bool(good.get(left) or good.get(right))
+
+        down = bytearray(width)
+        choices: Dict[int, List[int]] = {}
+        has_down: Dict[int, bool] = {}
+        for x in range(width):
+            if label[x] < 0 or (capable is not None and not capable[x]):
+                continue
+            root = self.find(parent, label[x])
+            choices.setdefault(root, []).append(x)
+            if self.rng.random() < 0.5:
+                down[x] = 1
+                has_down[root] = True
+        for root, cells in choices.items():
+            if not has_down.get(root):
+                down[self.rng.choice(cells)] = 1
+        for feeders in self.pockets.get(y, []):
+            down[self.rng.choice(feeders)] = 1
+
+        for x in range(width):
+            if down[x]:
+                row[x] &= ~SOUTH
+        return down
@@ -0,0 +1,90 @@
+"""Module for building the cost layer of weighted-terrain mazes.
+
+Costs come either from seeded value noise, which gives smooth regions of
+cheap and expensive cells, or from a file in the format of the cost
+section Maze.to_file writes: one row per line, two hex digits per cell.
+"""
+
+import random
+from typing import List, Optional, Tuple
+
+DEFAULT_MAX_COST = 9
+DEFAULT_SCALE = 8
+
+
+def noise_costs(
+    width: int, height: int, seed: Optional[int] = None,
+    max_cost: int = DEFAULT_MAX_COST, scale: int = DEFAULT_SCALE
+) -> bytearray:
+    """Generate cell costs from seeded value noise.
+
+    Random values are drawn on a lattice with one point every scale
+    cells and blended in between with smoothstep weights, so nearby
+    cells get similar costs.
+
+    Args:
+        width: The width of the maze in cells.
+        height: The height of the maze in cells.
+        seed: Optional random seed for reproducible terrain.
+        max_cost: The highest cost (1-255); costs range from 1 to it.
+        scale: The distance in cells between lattice points.
+
+    Returns:
+        One cost per cell, in row-major order.
+
+    Raises:
+        ValueError: If max_cost or scale is out of range.
+    """
+    if not 1 <= max_cost <= 255:
+        raise ValueError("The maximum cost must be between 1 and 255")
+    if scale < 1:
+        raise ValueError("The noise scale must be positive")
+    rng = random.Random(seed)
+    columns = width // scale + 2
+    lattice = [[rng.random() for _ in range(columns)]
+               for _ in range(height // scale + 2)]
+
+    def blend(offset: int) -> float:
+        t = offset / scale
+        return t * t * (3 - 2 * t)
+
+    # The lattice column and weight of every x, shared by all rows
+    xs: List[Tuple[int, float]] = [(x // scale, blend(x % scale))
+                                   for x in range(width)]
+    costs = bytearray(width * height)
+    for y in range(height):
+        top = lattice[y // scale]
+        bottom = lattice[y // scale + 1]
+        weight = blend(y % scale)
+        line = [a + (b - a) * weight for a, b in zip(top, bottom)]
+        costs[y * width:(y + 1) * width] = bytes(
+            min(max_cost, 1 + int((line[c] + (line[c + 1] - line[c]) * t)
+                                  * max_cost))
+            for c, t in xs)
+    return costs
+
+
+def load_costs(filepath: str, width: int) -> bytearray:
+    """Read cell costs from a file.
+
+    Args:
+        filepath: The cost file, one row per line with two hex digits
+            per cell.
+        width: The width of the maze in cells.
+
+    Returns:
+        The costs in row-major order; Maze.set_costs checks that there is
+        one per cell.
+
+    Raises:
+        ValueError: If a row has the wrong width or the file contains
+            anything but hex digits.
+    """
+    with open(filepath, "rb") as f:
+        rows = f.read().split()
+    if any(len(row) != 2 * width for row in rows):
+        raise ValueError(f"{filepath}: cost rows must have {width} cells")
+    try:
+        return bytearray(bytes.fromhex(b"".join(rows).decode("ascii")))
+    except (UnicodeDecodeError, ValueError):
+        raise ValueError(f"{filepath}: invalid cost file") from None
@@ -0,0 +1,286 @@
+"""Module for generating large mazes in parallel, one tile per task.
+
+The grid is split into a grid of rectangular tiles. Each tile is carved
+on its own, in a worker process, by the configured engine with a seed
+derived from the master seed and the tile position, so the result does
+not depend on the number of workers. The tiles are then stitched into a
+single perfect maze: the walls crossing tile borders are shuffled and
+opened Kruskal-style, one per pair of regions still disconnected, which
+adds a spanning tree over the tiles.
+"""
+
+import hashlib
+import os
+from array import array
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from mazegen.cell import NORTH, EAST, SOUTH, WEST
+from mazegen.disjoint_set import DisjointSet
+from mazegen.generator import ALGORITHMS, MazeGenerator
+from mazegen.maze import Maze
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+
+class TileJob(NamedTuple):
+    """Parameters for carving one tile."""
+
+    width: int
+    height: int
+    blocked: List[Tuple[int, int]]
+    seed: int
+    algorithm: str
+
+
+class TileResult(NamedTuple):
+    """A carved tile and the region each of its cells belongs to."""
+
+    walls: bytes
+    labels: Optional[array]
+    regions: int
+
+
+def parse_tiles(text: str) -> Tuple[int, int]:
+    """Parse a tile grid written as COLUMNSxROWS, or N for NxN.
+
+    Args:
+        text: The TILES config value, e.g. '4x2'.
+
+    Returns:
+        The number of tile columns and rows.
+
+    Raises:
+        ValueError: If the value is malformed or not positive.
+    """
+    columns, _, rows = text.strip().lower().partition("x")
+    tiles = (int(columns), int(rows or columns))
+    if min(tiles) < 1:
+        raise ValueError(f"Invalid TILES: {text}")
+    return tiles
+
+
+def tile_seed(master: int, column: int, row: int) -> int:
+    """Derive the seed of a tile from the master seed.
+
+    Args:
+        master: The master seed of the maze.
+        column: The column of the tile.
+        row: The row of the tile.
+
+    Returns:
+        A 63-bit seed unique to the tile.
+    """
+    digest = hashlib.sha256(f"{master}:{column}:{row}".encode()).digest()
+    return int.from_bytes(digest[:8], "little") >> 1
+
+
+def carve_tile(job: TileJob) -> TileResult:
+    """Carve one tile as a spanning forest of its free cells.
+
+    Runs inside a worker process. The engine is started again from every
+    cell it has not reached, so free cells cut off by pattern cells still
+    get carved. Tiles without pattern cells form a single region and skip
+    labelling.
+
+    Args:
+        job: The tile to carve.
+
+    Returns:
+        The wall masks of the tile and, when it has pattern cells, the
+        region label of each cell (-1 for pattern cells).
+    """
+    maze = Maze(job.width, job.height, (0, 0), (0, 0))
+    generator = MazeGenerator(maze, seed=job.seed, algorithm=job.algorithm)
+    visited = generator.visited
+    for x, y in job.blocked:
+        visited[y * job.width + x] = 1
+
+    engine = ALGORITHMS[job.algorithm]
+    start = visited.find(0)
+    while start >= 0:
+        engine(generator, start % job.width, start // job.width)
+        visited[start] = 1
+        start = visited.find(0, start)
+
+    if not job.blocked:
+        return TileResult(bytes(maze.walls), None, 1)
+
+    labels = array("l", [-1]) * len(maze.walls)
+    steps = ((NORTH, -job.width), (EAST, 1), (SOUTH, job.width), (WEST, -1))
+    blocked = {y * job.width + x for x, y in job.blocked}
+    regions = 0
+    for index in range(len(labels)):
+        if labels[index] >= 0 or index in blocked:
+            continue
+        labels[index] = regions
+        queue = deque([index])
+        while queue:
+            current = queue.popleft()
+            mask = maze.walls[current]
+            for bit, step in steps:
+                if not mask & bit and labels[current + step] < 0:
+                    labels[current + step] = regions
+                    queue.append(current + step)
+        regions += 1
+    return TileResult(bytes(maze.walls), labels, regions)
+
+
+class TiledGenerator(MazeGenerator):
+    """Generates a maze by carving tiles in parallel and stitching them.
+
+    Works as a drop-in MazeGenerator: the '42' pattern, entry/exit checks
+    and loop insertion behave the same, only carve is replaced. The maze
+    is deterministic for a given seed and tile grid, whatever the number
+    of workers.
+    """
+
+    def __init__(self, maze: Maze, seed: Optional[int] = None,
+                 algorithm: str = "backtracker",
+                 tiles: Tuple[int, int] = (2, 2),
+                 workers: Optional[int] = None):
+        """Initialize the tiled generator.
+
+        Args:
+            maze: The Maze object to generate.
+            seed: Optional random seed for reproducible generation.
+            algorithm: Name of the carving engine used inside each tile.
+            tiles: The number of tile columns and rows, each clamped to
+                the maze size.
+            workers: Number of worker processes (default: CPU count, 1 to
+                carve in this process).
+
+        Raises:
+            ValueError: If the algorithm is not registered.
+        """
+        super().__init__(maze, seed=seed, algorithm=algorithm)
+        self.tiles = (max(1, min(tiles[0], maze.width)),
+                      max(1, min(tiles[1], maze.height)))
+        self.workers = workers or os.cpu_count() or 1
+
+    def tile_bounds(self) -> Tuple[List[int], List[int]]:
+        """Compute where the tile columns and rows start and end.
+
+        Returns:
+            A tuple (xs, ys): tile column c spans xs[c] to xs[c + 1] and
+            tile row r spans ys[r] to ys[r + 1].
+        """
+        columns, rows = self.tiles
+        xs = [column * self.maze.width // columns
+              for column in range(columns + 1)]
+        ys = [row * self.maze.height // rows for row in range(rows + 1)]
+        return xs, ys
+
+    def carve(self, x: int, y: int) -> None:
+        """Carve every tile, in parallel, then stitch them together.
+
+        The start cell is unused: every tile is carved from its own
+        cells.
+
+        Args:
+            x: The x-coordinate of the starting cell.
+            y: The y-coordinate of the starting cell.
+        """
+        master = self.rng.getrandbits(64)
+        xs, ys = self.tile_bounds()
+        pattern: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+        for cell_x, cell_y in self.pattern_42_cells:
+            column = bisect_right(xs, cell_x) - 1
+            row = bisect_right(ys, cell_y) - 1
+            pattern.setdefault((column, row), []).append(
+                (cell_x - xs[column], cell_y - ys[row]))
+
+        jobs = [
+            TileJob(xs[column + 1] - xs[column], ys[row + 1] - ys[row],
+                    pattern.get((column, row), []),
+                    tile_seed(master, column, row), self.algorithm)
+            for row in range(self.tiles[1])
+            for column in range(self.tiles[0])
+        ]
+        if self.workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                results = list(pool.map(carve_tile, jobs))
+        else:
+            results = [carve_tile(job) for job in jobs]
+
+        self.assemble(results, xs, ys)
+        self.stitch(results, xs, ys)
+
+    def assemble(self, results: List[TileResult], xs: List[int],
+                 ys: List[int]) -> None:
+        """Copy the carved tiles into the maze, row by row.
+
+        Args:
+            results: The carved tiles, row-major.
+            xs: The tile column bounds from tile_bounds.
+            ys: The tile row bounds from tile_bounds.
+        """
+        width = self.maze.width
+        walls = self.maze.walls
+        columns = self.tiles[0]
+        for number, result in enumerate(results):
+            column, row = number % columns, number // columns
+            tile_width = xs[column + 1] - xs[column]
+            for y in range(ys[row], ys[row + 1]):
+                offset = (y - ys[row]) * tile_width
+                start = y * width + xs[column]
+                walls[start:start + tile_width] = (
+                    result.walls[offset:offset + tile_width])
+
+    def stitch(self, results: List[TileResult], xs: List[int],
+               ys: List[int]) -> None:
+        """Join the tile regions into one tree across tile borders.
+
+        Every wall between two free cells of neighbouring tiles is a
+        candidate. Candidates are shuffled and a wall is opened only when
+        it joins two regions not yet connected, so each pair of regions
+        gets at most one wall and the maze stays perfect.
+
+        Args:
+            results: The carved tiles, row-major.
+            xs: The tile column bounds from tile_bounds.
+            ys: The tile row bounds from tile_bounds.
+        """
+        width = self.maze.width
+        walls = self.maze.walls
+        columns = self.tiles[0]
+        blocked = self.visited
+        offsets = [0]
+        for result in results:
+            offsets.append(offsets[-1] + result.regions)
+
+        def region(x: int, y: int) -> int:
+            column = bisect_right(xs, x) - 1
+            row = bisect_right(ys, y) - 1
+            number = row * columns + column
+            labels = results[number].labels
+            if labels is None:
+                return offsets[number]
+            tile_width = xs[column + 1] - xs[column]
+            local = (y - ys[row]) * tile_width + x - xs[column]
+            return offsets[number] + int(labels[local])
+
+        # Each candidate is cell index * 2, plus 1 for a south wall
+        candidates = array("q")
+        for x in xs[1:-1]:
+            for y in range(self.maze.height):
+                index = y * width + x - 1
+                if not blocked[index] and not blocked[index + 1]:
+                    candidates.append(index * 2)
+        for y in ys[1:-1]:
+            for x in range(width):
+                index = (y - 1) * width + x
+                if not blocked[index] and not blocked[index + width]:
+                    candidates.append(index * 2 + 1)
+        self.rng.shuffle(candidates)
+
+        sets = DisjointSet(offsets[-1])
+        for candidate in candidates:
+            index = candidate >> 1
+            x, y = index % width, index // width
+            if candidate & 1:
+                if sets.union(region(x, y), region(x, y + 1)):
+                    walls[index] &= ~SOUTH
+                    walls[index + width] &= ~NORTH
+            elif sets.union(region(x, y), region(x + 1, y)):
+                walls[index] &= ~EAST
+                walls[index + 1] &= ~WEST
@@ -0,0 +1,302 @@
+"""Module for validating maze files in the hex output format.
+
+The grid is streamed two rows at a time and each wall check runs over a
+whole row at once, with NumPy when it is installed and otherwise with
+Python's arbitrary-precision integers, where a row of hex digits is a
+single integer holding one nibble per cell.
+"""
+
+import time
+from array import array
+from functools import lru_cache
+from mazegen.maze import HEX_DIGITS, HEX_VALUES
+from typing import BinaryIO, Dict, List, NamedTuple, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MOVE_BITS = {"N": 1, "E": 2, "S": 4, "W": 8}
+MOVE_STEPS = {"N": (0, -1), "E": (1, 0), "S": (0, 1), "W": (-1, 0)}
+WALL_NAMES = {1: "north", 2: "east", 4: "south", 8: "west"}
+
+
+class ValidationReport(NamedTuple):
+    """Outcome of validating a maze file."""
+
+    width: int
+    height: int
+    errors: List[str]
+    error_count: int
+    path_ok: bool
+    path_length: int
+    seconds: float
+    size: int
+
+    @property
+    def valid(self) -> bool:
+        """Whether no error at all was found."""
+        return self.error_count == 0
+
+
+class ErrorLog:
+    """Counts errors and keeps the messages of the first few."""
+
+    def __init__(self, limit: int):
+        """Initialize an empty log.
+
+        Args:
+            limit: How many messages to keep.
+        """
+        self.limit = limit
+        self.count = 0
+        self.messages: List[str] = []
+
+    def add(self, message: str) -> None:
+        """Record an error.
+
+        Args:
+            message: The description of the error.
+        """
+        self.count += 1
+        if len(self.messages) < self.limit:
+            self.messages.append(message)
+
+    @property
+    def full(self) -> bool:
+        """Whether no further message would be kept."""
+        return len(self.messages) >= self.limit
+
+
+def read_footer(f: BinaryIO) -> Tuple[Tuple[int, int], Tuple[int, int], str]:
+    """Read entry, exit and path from the end of a maze file.
+
+    Seeks backwards from the end so the grid does not need to be read
+    first.
+
+    Args:
+        f: The maze file opened in binary mode.
+
+    Returns:
+        A tuple (entry, exit, path).
+
+    Raises:
+        ValueError: If the footer is malformed.
+    """
+    position = f.seek(0, 2)
+    tail = b""
+    while position > 0:
+        step = min(1 << 16, position)
+        position -= step
+        f.seek(position)
+        tail = f.read(step) + tail
+        if tail[:-1].count(b"\n") >= 3:
+            break
+    if tail.endswith(b"\n"):
+        tail = tail[:-1]
+    lines = tail.replace(b"\r\n", b"\n").split(b"\n")
+    if len(lines) < 4 or lines[-4].strip():
+        raise ValueError("missing blank line, entry, exit or path")
+
+    points = []
+    for line in lines[-3:-1]:
+        parts = line.split(b",")
+        if len(parts) != 2:
+            raise ValueError(f"invalid coordinates {line!r}")
+        points.append((int(parts[0]), int(parts[1])))
+    return points[0], points[1], lines[-1].strip().decode("ascii")
+
+
+def plan_path(
+    entry: Tuple[int, int], exit: Tuple[int, int], path: str,
+    log: ErrorLog
+) -> Tuple[Dict[int, array], Tuple[int, int], bool]:
+    """Walk the path and list, per row, the walls it must pass through.
+
+    Args:
+        entry: The (x, y) coordinates of the entry.
+        exit: The (x, y) coordinates of the exit.
+        path: The solution path as a string of N/E/S/W moves.
+        log: Where to record invalid moves.
+
+    Returns:
+        A tuple (checks, last, ok): checks maps a row to an array of
+        x * 16 + wall bit values to verify, last is the cell reached and
+        ok is False if the walk itself was invalid.
+    """
+    checks: Dict[int, array] = {}
+    x, y = entry
+    if not path:
+        # Nothing to verify, e.g. files written by the streaming generator
+        return checks, (x, y), entry == exit
+    for step, move in enumerate(path):
+        if move not in MOVE_BITS:
+            log.add(f"Invalid move {move!r} at path step {step}")
+            return checks, (x, y), False
+        checks.setdefault(y, array("q")).append(x * 16 + MOVE_BITS[move])
+        dx, dy = MOVE_STEPS[move]
+        x += dx
+        y += dy
+    ok = (x, y) == exit
+    if not ok:
+        log.add(f"Path ends at ({x},{y}) instead of exit "
+                f"({exit[0]},{exit[1]})")
+    return checks, (x, y), ok
+
+
+@lru_cache(maxsize=8)
+def row_masks(width: int) -> Tuple[int, int]:
+    """Build the bit masks selecting one wall flag per cell of a row.
+
+    Args:
+        width: The number of cells per row.
+
+    Returns:
+        A tuple (east, north): the east-wall bits of every cell but the
+        last, and the north-wall bits of every cell.
+    """
+    return int("2" * (width - 1) + "0", 16), int("1" * width, 16)
+
+
+def row_mismatches(upper: Optional[bytes], row: bytes,
+                   width: int) -> Tuple[List[int], List[int]]:
+    """Find the walls that the two sides encode differently.
+
+    Args:
+        upper: The previous row as wall masks, or None for the first row.
+        row: The current row as wall masks.
+        width: The number of cells per row.
+
+    Returns:
+        A tuple (east, south): x-coordinates in the current row whose east
+        wall disagrees with the next cell, and x-coordinates in the
+        previous row whose south wall disagrees with the current row.
+    """
+    if np is not None:
+        cells = np.frombuffer(row, dtype=np.uint8)
+        east = np.nonzero(((cells[:-1] >> 1) ^ (cells[1:] >> 3)) & 1)[0]
+        south: List[int] = []
+        if upper is not None:
+            above = np.frombuffer(upper, dtype=np.uint8)
+            south = np.nonzero(((above >> 2) ^ cells) & 1)[0].tolist()
+        return east.tolist(), south
+
+    # Cell x sits in the nibble at bit 4 * (width - 1 - x), so shifting
+    # left by 2 lines each west bit up with the east bit of its neighbour
+    east_mask, north_mask = row_masks(width)
+    value = int(row.translate(HEX_DIGITS), 16)
+    east = bit_cells((value ^ (value << 2)) & east_mask, 1, width)
+    south = []
+    if upper is not None:
+        above = int(upper.translate(HEX_DIGITS), 16)
+        south = bit_cells(((above >> 2) ^ value) & north_mask, 0, width)
+    return east, south
+
+
+def bit_cells(bits: int, offset: int, width: int) -> List[int]:
+    """List the cells owning the set bits of a row-sized integer.
+
+    Args:
+        bits: The integer with one flagged bit per faulty cell.
+        offset: The bit position of the flag inside each nibble.
+        width: The number of cells per row.
+
+    Returns:
+        The x-coordinates of the flagged cells, in increasing order.
+    """
+    cells = []
+    while bits:
+        low = bits & -bits
+        cells.append(width - 1 - (low.bit_length() - 1 - offset) // 4)
+        bits ^= low
+    cells.reverse()
+    return cells
+
+
+def validate_file(filepath: str, max_errors: int = 20) -> ValidationReport:
+    """Validate a maze file written by Maze.to_file.
+
+    Checks that every row has the same width and only hex digits, that
+    neighbouring cells agree on their shared walls, and that the stored
+    path starts at the entry, only crosses open walls and ends at the
+    exit. Only two grid rows are held in memory at any time.
+
+    Args:
+        filepath: The maze file to validate.
+        max_errors: How many error messages to keep (all are counted).
+
+    Returns:
+        The validation report.
+    """
+    started = time.perf_counter()
+    log = ErrorLog(max_errors)
+    width = 0
+    height = 0
+
+    with open(filepath, "rb") as f:
+        try:
+            entry, exit, path = read_footer(f)
+            checks, _, path_ok = plan_path(entry, exit, path, log)
+        except ValueError as e:
+            log.add(f"Invalid footer: {e}")
+            entry, exit, path = (0, 0), (0, 0), ""
+            checks, path_ok = {}, False
+        size = f.seek(0, 2)
+        f.seek(0)
+
+        upper: Optional[bytes] = None
+        for line in f:
+            line = line.rstrip(b"\r\n")
+            if not line:
+                break
+            if not width:
+                width = len(line)
+            if len(line) != width:
+                log.add(f"Row {height} has {len(line)} cells, "
+                        f"expected {width}")
+                upper = None
+                height += 1
+                continue
+            if line.translate(None, b"0123456789ABCDEFabcdef"):
+                log.add(f"Row {height} contains a non-hex character")
+                upper = None
+                height += 1
+                continue
+
+            row = line.translate(HEX_VALUES)
+            east, south = row_mismatches(upper, row, width)
+            for x in south:
+                log.add(f"Wrong encoding for ({x},{height - 1}): south "
+                        f"wall disagrees with ({x},{height})")
+            for x in east:
+                log.add(f"Wrong encoding for ({x},{height}): east wall "
+                        f"disagrees with ({x + 1},{height})")
+
+            for check in checks.pop(height, ()):
+                x, bit = check >> 4, check & 15
+                if x < 0 or x >= width:
+                    path_ok = False
+                    log.add(f"Path leaves the maze at ({x},{height})")
+                elif row[x] & bit:
+                    path_ok = False
+                    log.add(f"Path crosses the {WALL_NAMES[bit]} wall "
+                            f"of ({x},{height})")
+            upper = row
+            height += 1
+
+    if entry[0] >= width or entry[1] >= height:
+        path_ok = False
+        log.add(f"Entry ({entry[0]},{entry[1]}) is outside the maze")
+    if exit[0] >= width or exit[1] >= height:
+        path_ok = False
+        log.add(f"Exit ({exit[0]},{exit[1]}) is outside the maze")
+    for y in sorted(checks):
+        path_ok = False
+        log.add(f"Path leaves the maze at row {y}")
+        if log.full:
+            break
+
+    return ValidationReport(width, height, log.messages, log.count,
+                            path_ok, len(path),
+                            time.perf_counter() - started, size)
@@ -1,29 +1,42 @@
-# This script does not check for errors or malformed files.
-# It only validates that neighbooring cells sharing a wall have
-#  both the correct encoding.
-# Usage: python3 output_validator.py output_maze.txt
+# Validates a maze output file: every row must have the same width and
+# only hex digits, neighbouring cells sharing a wall must both have the
+# correct encoding, and the solution path must walk from entry to exit
+# through open walls only.
+# Usage: python3 output_validator.py output_maze.txt [max_errors]
 
 import sys
+from mazegen.validator import validate_file
 
-if len(sys.argv) != 2:
-    print(f"Usage: python3 {sys.argv[0]} <output_file>")
-    sys.exit(1)
-
-g = []
-for line in open(sys.argv[1]):
-    if line.strip() == "":
-        break
-    g.append([int(c, 16) for c in line.strip(" \t\n\r")])
-
-for r in range(len(g)):
-    for c in range(len(g[0])):
-        v = g[r][c]
-        if not all(
-            [
-                (r < 1 or v & 1 == (g[r - 1][c] >> 2) & 1),
-                (c >= len(g[0]) - 1 or (v >> 1) & 1 == (g[r][c + 1] >> 3) & 1),
-                (r >= len(g) - 1 or (v >> 2) & 1 == g[r + 1][c] & 1),
-                (c < 1 or (v >> 3) & 1 == (g[r][c - 1] >> 1) & 1),
-            ]
-        ):
-            print(f"Wrong encoding for ({c},{r})")
+
+def main() -> None:
+    """Validate the file given on the command line and print a report."""
+    if len(sys.argv) not in (2, 3):
+        print(f"Usage: python3 {sys.argv[0]} <output_file> [max_errors]")
+        sys.exit(1)
+    max_errors = int(sys.argv[2]) if len(sys.argv) == 3 else 20
+
+    report = validate_file(sys.argv[1], max_errors)
+
+    for error in report.errors:
+        print(error)
+    if report.error_count > len(report.errors):
+        print(f"... {report.error_count - len(report.errors)} more error(s)")
+
+    if report.path_ok:
+        path_status = "ok"
+    elif report.path_length == 0:
+        path_status = "not stored"
+    else:
+        path_status = "invalid"
+    cells = report.width * report.height
+    seconds = max(report.seconds, 1e-9)
+    print(f"{report.width}x{report.height} maze, "
+          f"{report.error_count} error(s), path {path_status} "
+          f"({report.path_length} moves)")
+    print(f"Checked in {report.seconds:.3f}s: {cells / seconds:,.0f} "
+          f"cells/s, {report.size / seconds / 1e6:,.1f} MB/s")
+    sys.exit(0 if report.valid else 1)
+
+
+if __name__ == "__main__":
+    main()